@@ -1,9 +1,21 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.urls import path
 from .models import (
-    Chief, HistoricalEvent, TourismSite, Booking,
+    Chief, HistoricalEvent, TourismSite, Booking, CapacityExceeded, CapacityLedger,
     ProductCategory, Product, Bid, ProjectCategory,
     Project, Newsletter, ContactMessage
 )
+from .exports import CHUNK_SIZE, bookings_response, csv_response
+
+
+class ExportChangeList(ChangeList):
+    """Changelist that only resolves filters and search: no counts, no page"""
+
+    def get_results(self, request):
+        pass
 
 
 @admin.register(Chief)
@@ -46,13 +58,40 @@ class TourismSiteAdmin(admin.ModelAdmin):
     )
 
 
+class BookingAdminForm(forms.ModelForm):
+    class Meta:
+        model = Booking
+        fields = '__all__'
+
+    def clean(self):
+        """Refuse places the capacity ledger cannot give, instead of a 500 from save()"""
+        cleaned_data = super().clean()
+        site = cleaned_data.get('tourism_site')
+        visit_date = cleaned_data.get('visit_date')
+        visitors = cleaned_data.get('number_of_visitors')
+        if site is None or visit_date is None or visitors is None or cleaned_data.get('status') == 'cancelled':
+            return cleaned_data
+        remaining = CapacityLedger.objects.remaining(site.pk, visit_date)
+        # An edited booking gives its current places back before it claims
+        # the new ones (Booking.save())
+        booking = self.instance
+        if (booking.pk and booking.status != 'cancelled' and
+                booking.tourism_site_id == site.pk and booking.visit_date == visit_date):
+            remaining += booking.number_of_visitors
+        if visitors > remaining:
+            self.add_error('number_of_visitors', str(CapacityExceeded(remaining)))
+        return cleaned_data
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
+    form = BookingAdminForm
     list_display = ['booking_reference', 'visitor_name', 'tourism_site', 'visit_date', 'status', 'total_amount']
     list_filter = ['status', 'visitor_type', 'visit_date', 'tourism_site']
     search_fields = ['booking_reference', 'visitor_name', 'visitor_email']
     date_hierarchy = 'visit_date'
     readonly_fields = ['booking_reference', 'created_at', 'updated_at']
+    actions = ['export_selected']
     fieldsets = (
         ('Booking Details', {
             'fields': ('booking_reference', 'tourism_site', 'visit_date', 'visit_time', 'status')
@@ -65,6 +104,38 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_urls(self):
+        export = path('export/', self.admin_site.admin_view(self.export_view), name='core_booking_export')
+        return [export, *super().get_urls()]
+
+    def export_view(self, request):
+        """CSV of every booking the changelist shows under the current filters and search"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        changelist = self.get_changelist_instance(request)
+        return bookings_response(changelist.get_queryset(request))
+
+    def get_changelist(self, request, **kwargs):
+        if request.resolver_match.url_name == 'core_booking_export':
+            return ExportChangeList
+        return super().get_changelist(request, **kwargs)
+
+    @admin.action(description='Export selected bookings as CSV')
+    def export_selected(self, request, queryset):
+        return bookings_response(queryset)
+
+
+@admin.register(CapacityLedger)
+class CapacityLedgerAdmin(admin.ModelAdmin):
+    list_display = ['tourism_site', 'visit_date', 'booked_visitors']
+    list_filter = ['tourism_site']
+    list_select_related = ['tourism_site']
+    date_hierarchy = 'visit_date'
+    readonly_fields = ['tourism_site', 'visit_date', 'booked_visitors']
+
+    def has_add_permission(self, request):
+        return False
+
 
 @admin.register(ProductCategory)
 class ProductCategoryAdmin(admin.ModelAdmin):
@@ -75,10 +146,12 @@ class ProductCategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'category', 'product_type', 'price', 'status', 'featured', 'created_at']
+    list_display = ['name', 'category', 'product_type', 'price', 'status', 'current_bid', 'bid_count', 'featured', 'created_at']
     list_filter = ['product_type', 'status', 'category', 'featured']
+    list_select_related = ['category']
     search_fields = ['name', 'description', 'artist_name']
     prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ['bid_count']
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'category', 'description', 'slug')
@@ -87,7 +160,7 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('product_type', 'artist_name', 'year_created', 'dimensions', 'materials')
         }),
         ('Pricing', {
-            'fields': ('price', 'starting_bid', 'current_bid', 'status', 'stock_quantity')
+            'fields': ('price', 'starting_bid', 'current_bid', 'bid_count', 'status', 'stock_quantity')
         }),
         ('Media', {
             'fields': ('image', 'gallery_images', 'nft_metadata')
@@ -102,6 +175,7 @@ class ProductAdmin(admin.ModelAdmin):
 class BidAdmin(admin.ModelAdmin):
     list_display = ['product', 'bidder_name', 'bid_amount', 'is_winning', 'created_at']
     list_filter = ['is_winning', 'created_at']
+    list_select_related = ['product']
     search_fields = ['bidder_name', 'bidder_email', 'product__name']
     readonly_fields = ['created_at']
 
@@ -142,6 +216,15 @@ class NewsletterAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'subscribed_at']
     search_fields = ['email', 'name']
     readonly_fields = ['subscribed_at']
+    actions = ['export_active']
+
+    @admin.action(description='Export active subscribers as CSV')
+    def export_active(self, request, queryset):
+        rows = (
+            queryset.filter(is_active=True).order_by('pk')
+            .values_list('email', 'name', 'subscribed_at').iterator(chunk_size=CHUNK_SIZE)
+        )
+        return csv_response('newsletter-subscribers.csv', ['email', 'name', 'subscribed_at'], rows)
 
 
 @admin.register(ContactMessage)
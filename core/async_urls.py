@@ -0,0 +1,22 @@
+"""core/urls.py with the read-only pages served by their async views"""
+from django.urls import path
+from . import async_views, urls
+
+ASYNC_VIEWS = {
+    'home': async_views.home,
+    'heritage': async_views.heritage_view,
+    'chief_detail': async_views.chief_detail,
+    'tourism': async_views.tourism_view,
+    'tourism_detail': async_views.tourism_detail,
+    'booking_confirmation': async_views.booking_confirmation,
+    'products': async_views.products_view,
+    'product_detail': async_views.product_detail,
+    'projects': async_views.projects_view,
+    'project_detail': async_views.project_detail,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in urls.urlpatterns
+]
@@ -0,0 +1,210 @@
+"""Async versions of the read-only pages, served when ASYNC_VIEWS is on.
+
+Each view loads its data through the async ORM interface and hands the
+finished lists to the same templates as ``core.views``. Rendering runs in a
+worker thread because the templates still read the session (messages) and
+the cache synchronously.
+Form submissions (bookings, bids) go to the synchronous views unchanged.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.utils import timezone
+
+from . import views
+from .conditional import chief_page, conditional_page, product_page, project_page, tourism_page
+from .models import (
+    Chief, HistoricalEvent, TourismSite, Booking, Bid,
+    Product, ProductCategory, Project, ProjectCategory
+)
+from .pagination import ESTIMATE_CAP, InvalidCursor, estimated_count, paginate_by_cursor
+from .references import is_valid, normalize
+from .replica import aget_or_404, replica_reads
+from .timeline import get_timeline
+
+arender = sync_to_async(render)
+aget_timeline = sync_to_async(get_timeline)
+
+# Context variable of the home page rendered by each cached fragment
+HOME_CONTEXT = {
+    'home_chiefs': 'chiefs',
+    'home_tourism_sites': 'tourism_sites',
+    'home_featured_products': 'featured_products',
+    'home_featured_projects': 'featured_projects',
+    'home_recent_events': 'recent_events',
+}
+
+
+async def evaluate(queryset):
+    return [obj async for obj in queryset]
+
+
+async def evaluate_each(**querysets):
+    """Evaluate the querysets one after another; returns {name: list}"""
+    return {name: await evaluate(queryset) for name, queryset in querysets.items()}
+
+
+async def aget_object_or_404(queryset, **lookup):
+    try:
+        return await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+
+@replica_reads
+async def home(request):
+    """Homepage with featured content"""
+    sections = {
+        'chiefs': Chief.objects.all()[:2],
+        'featured_projects': Project.objects.filter(featured=True, status='ongoing').select_related('category')[:3],
+        'featured_products': Product.objects.filter(featured=True, status='available')[:6],
+        'recent_events': HistoricalEvent.objects.all()[:3],
+        'tourism_sites': TourismSite.objects.filter(is_active=True)[:3],
+    }
+    # A section whose fragment is cached never evaluates its queryset
+    keys = {make_template_fragment_key(name): context for name, context in HOME_CONTEXT.items()}
+    cached = await cache.aget_many(keys)
+    missing = {context: sections[context] for key, context in keys.items() if key not in cached}
+    sections.update(await evaluate_each(**missing))
+    return await arender(request, 'core/home.html', sections)
+
+
+@replica_reads
+async def heritage_view(request):
+    """Historical background page"""
+    timeline = await aget_timeline(request.GET.get('chief', ''))
+    return await arender(request, 'core/heritage.html', {'timeline': timeline, 'chiefs': timeline.chiefs})
+
+
+@conditional_page(chief_page)
+async def chief_detail(request, slug):
+    """Individual chief detail page"""
+    timeline = await aget_timeline(slug)
+    chief = timeline.chief(slug)
+    if chief is None:
+        raise Http404('No Chief matches the given query.')
+    return await arender(request, 'core/chief_detail.html', {
+        'chief': chief, 'events': timeline.events, 'timeline': timeline,
+    })
+
+
+async def tourism_view(request):
+    """Tourism sites listing"""
+    sites = TourismSite.objects.filter(is_active=True)
+    site_type = request.GET.get('type')
+    if site_type:
+        sites = sites.filter(site_type=site_type)
+
+    context = await evaluate_each(sites=sites)
+    context['site_types'] = TourismSite.SITE_TYPES
+    return await arender(request, 'core/tourism.html', context)
+
+
+@conditional_page(tourism_page)
+async def tourism_detail(request, slug):
+    """Tourism site detail; bookings are handled by the synchronous view"""
+    if request.method == 'POST':
+        return await sync_to_async(views.tourism_detail)(request, slug)
+    site = await aget_object_or_404(TourismSite.objects.all(), slug=slug, is_active=True)
+    return await arender(request, 'core/tourism_detail.html', {'site': site, 'today': timezone.localdate()})
+
+
+@replica_reads
+async def booking_confirmation(request, reference):
+    """Booking confirmation page; contact details only for the session that booked"""
+    if not is_valid(reference):
+        raise Http404('No Booking matches the given query.')
+    reference = normalize(reference)
+    booking = await aget_or_404(Booking.objects.select_related('tourism_site'), booking_reference=reference)
+    own = await request.session.aget(views.BOOKINGS_SESSION_KEY, ())
+    return await arender(request, 'core/booking_confirmation.html', {
+        'booking': booking, 'show_contact': reference in own,
+    })
+
+
+@replica_reads
+async def products_view(request):
+    """Products catalog with filtering"""
+    products = views.filter_products(request.GET)
+    filters = request.GET.copy()
+    filters.pop('page', None)
+    cursor = filters.pop('cursor', [None])[0]
+    # Search results keep their rank order, which a (created_at, id) cursor cannot
+    cursor_mode = (settings.PRODUCTS_CURSOR_PAGINATION or cursor is not None) and not filters.get('search')
+
+    if cursor_mode:
+        try:
+            page_obj = await sync_to_async(paginate_by_cursor)(products, cursor, views.PRODUCTS_PER_PAGE)
+        except InvalidCursor:
+            return redirect(f"{request.path}?{filters.urlencode()}")
+        total = await sync_to_async(estimated_count)(products)
+        categories = await evaluate(ProductCategory.objects.all())
+        total_capped = total > ESTIMATE_CAP
+        total = min(total, ESTIMATE_CAP)
+    else:
+        total = await products.acount()
+        categories = await evaluate(ProductCategory.objects.all())
+        total_capped = False
+        paginator = Paginator(products, views.PRODUCTS_PER_PAGE)
+        paginator.count = total  # counted above; skip the paginator's own COUNT
+        page_obj = get_page(paginator, request.GET.get('page'))
+        page_obj.object_list = await evaluate(page_obj.object_list)
+
+    context = {
+        'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'total': total,
+        'total_capped': total_capped,
+        'filter_query': filters.urlencode(),
+        'categories': categories,
+        'product_types': Product.PRODUCT_TYPES,
+    }
+    return await arender(request, 'core/products.html', context)
+
+
+def get_page(paginator, number):
+    # Paginator.get_page() without the fallbacks that would count again
+    try:
+        return paginator.page(number)
+    except PageNotAnInteger:
+        return paginator.page(1)
+    except EmptyPage:
+        return paginator.page(paginator.num_pages)
+
+
+@conditional_page(product_page)
+async def product_detail(request, slug):
+    """Product detail; bids are handled by the synchronous view"""
+    if request.method == 'POST':
+        return await sync_to_async(views.product_detail)(request, slug)
+    product = await aget_object_or_404(Product.objects.select_related('category'), slug=slug)
+    context = await evaluate_each(recent_bids=product.bids.all()[:5])
+    context['product'] = product
+    return await arender(request, 'core/product_detail.html', context)
+
+
+async def projects_view(request):
+    """Projects showcase page"""
+    projects = Project.objects.select_related('category')
+    category_slug = request.GET.get('category')
+    if category_slug:
+        projects = projects.filter(category__slug=category_slug)
+    status = request.GET.get('status')
+    if status:
+        projects = projects.filter(status=status)
+
+    context = await evaluate_each(projects=projects, categories=ProjectCategory.objects.all())
+    context['status_choices'] = Project.STATUS_CHOICES
+    return await arender(request, 'core/projects.html', context)
+
+
+@conditional_page(project_page)
+async def project_detail(request, slug):
+    """Individual project detail page"""
+    project = await aget_object_or_404(Project.objects.select_related('category'), slug=slug)
+    return await arender(request, 'core/project_detail.html', {'project': project})
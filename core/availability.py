@@ -0,0 +1,53 @@
+"""Remaining visitor places per site and day, read from the capacity ledger."""
+from datetime import timedelta
+
+from django.core.cache import cache
+
+from .caching import AVAILABILITY_TIMEOUT, availability_cache_key
+from .models import CapacityLedger
+
+MAX_DAYS = 180
+
+
+def build_calendar(sites, start, days):
+    """Return ``{site_id: [remaining places for each day]}`` from one ledger query"""
+    end = start + timedelta(days=days - 1)
+    calendar = {site.pk: [site.capacity] * days for site in sites}
+    booked = CapacityLedger.objects.filter(
+        tourism_site__in=list(calendar),
+        visit_date__range=(start, end),
+    ).values_list('tourism_site_id', 'visit_date', 'booked_visitors')
+    for site_id, visit_date, visitors in booked:
+        remaining = calendar[site_id]
+        offset = (visit_date - start).days
+        remaining[offset] = max(remaining[offset] - visitors, 0)
+    return calendar
+
+
+def site_calendars(sites, start, days, site_id=None):
+    """JSON-ready calendars for ``sites``, cached until a booking changes them.
+
+    ``site_id`` names the single site being asked for; None means the
+    calendar covers every active site.
+    """
+    key = availability_cache_key(site_id, start, days)
+    payload = cache.get(key)
+    if payload is None:
+        sites = list(sites)
+        calendar = build_calendar(sites, start, days)
+        dates = [(start + timedelta(days=n)).isoformat() for n in range(days)]
+        payload = {
+            'start': start.isoformat(),
+            'days': days,
+            'sites': [
+                {
+                    'slug': site.slug,
+                    'name': site.name,
+                    'capacity': site.capacity,
+                    'remaining': dict(zip(dates, calendar[site.pk])),
+                }
+                for site in sites
+            ],
+        }
+        cache.set(key, payload, AVAILABILITY_TIMEOUT)
+    return payload
@@ -0,0 +1,81 @@
+"""Bid placement for the products marketplace.
+
+The minimum-bid check and the write happen in one conditional UPDATE on the
+product row, so two bidders racing on the same product can never both win:
+the database serialises the UPDATEs and the loser no longer matches the
+``bid_amount > current minimum`` condition.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import DecimalField, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from .caching import invalidate_fragments
+from .models import Product, Bid
+
+CENTS = Decimal('0.01')
+
+
+class BidRejected(Exception):
+    """Raised when a bid does not beat the product's current minimum"""
+
+    def __init__(self, minimum):
+        self.minimum = minimum
+        super().__init__(f'Bid must be higher than ${minimum}')
+
+
+def parse_amount(raw):
+    """Parse a submitted bid amount into a cent-exact Decimal, or None"""
+    try:
+        amount = Decimal(str(raw).strip()).quantize(CENTS)
+    except (InvalidOperation, ValueError):
+        return None
+    if not amount.is_finite() or amount <= 0:
+        return None
+    return amount
+
+
+def minimum_bid():
+    """Database expression for the amount a new bid has to beat"""
+    return Coalesce('current_bid', 'starting_bid', 'price')
+
+
+def place_bid(product, bidder_name, bidder_email, bidder_phone, amount):
+    """Record ``amount`` as the new winning bid on ``product``.
+
+    Returns the created Bid, or raises BidRejected with the minimum that
+    was in force when the bid lost.
+    """
+    amount = Decimal(amount).quantize(CENTS)
+    bid_value = Value(amount, output_field=DecimalField(max_digits=10, decimal_places=2))
+
+    with transaction.atomic():
+        # Check-and-claim in a single statement; this also takes the write
+        # lock, so everything below runs without competing bidders.
+        claimed = Product.objects.filter(
+            GreaterThan(bid_value, minimum_bid()),
+            pk=product.pk,
+        ).update(current_bid=bid_value, status='bidding', updated_at=timezone.now())
+
+        if not claimed:
+            current = Product.objects.filter(pk=product.pk).values_list(minimum_bid(), flat=True).first()
+            raise BidRejected(current)
+
+        if product.featured and product.status == 'available':
+            # Now 'bidding', so it drops out of the home page showcase
+            invalidate_fragments('home_featured_products')
+
+        Bid.objects.filter(product_id=product.pk, is_winning=True).update(is_winning=False)
+        bid = Bid.objects.create(
+            product_id=product.pk,
+            bidder_name=bidder_name,
+            bidder_email=bidder_email,
+            bidder_phone=bidder_phone,
+            bid_amount=amount,
+            is_winning=True,
+        )
+
+    return bid
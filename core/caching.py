@@ -0,0 +1,131 @@
+"""Cached page fragments and the models each one is rendered from.
+
+Fragments are cached without a timeout and dropped from ``core.signals``
+whenever one of their source models is saved or deleted.
+"""
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+
+from .models import (
+    Chief, HistoricalEvent, TourismSite, Product, Project, ProjectCategory
+)
+from .replica import delete_after_lag
+
+# {% cache %} fragment name in core/home.html -> models it is built from
+HOME_SECTIONS = {
+    'home_chiefs': (Chief,),
+    'home_tourism_sites': (TourismSite,),
+    'home_featured_products': (Product,),
+    'home_featured_projects': (Project, ProjectCategory),
+    'home_recent_events': (HistoricalEvent,),
+}
+
+
+def sections_for(model):
+    return [name for name, models in HOME_SECTIONS.items() if model in models]
+
+
+def invalidate_fragments(*names):
+    """Drop the named fragments once the current transaction commits.
+
+    Deleting before the commit would let a concurrent request re-cache the
+    old rows, which would then never expire.
+    """
+    delete_on_commit([make_template_fragment_key(name) for name in names])
+
+
+def delete_on_commit(keys):
+    """Delete ``keys`` once the current transaction commits, and again once
+    the read replica has caught up with it (see core/replica.py)"""
+    def delete():
+        cache.delete_many(keys)
+        delete_after_lag(keys)
+    transaction.on_commit(delete)
+
+
+# Availability calendars are cached briefly and keyed by a version token
+# that changes whenever a booking for the site is written.
+AVAILABILITY_TIMEOUT = 60
+
+
+def _version(version_key):
+    """The current token under ``version_key``, created if there is none"""
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(version_key, version, None)
+        version = cache.get(version_key, version)
+    return version
+
+
+def _availability_version_key(site_id):
+    return f'availability_version:{site_id or "all"}'
+
+
+def availability_cache_key(site_id, start, days):
+    version = _version(_availability_version_key(site_id))
+    return f'availability:{site_id or "all"}:{version}:{start.isoformat()}:{days}'
+
+
+def invalidate_availability(site_id):
+    """Retire cached calendars for ``site_id`` and the all-sites calendar"""
+    delete_on_commit([_availability_version_key(site_id), _availability_version_key(None)])
+
+
+# The heritage timeline (core/timeline.py) and the event list rendered from
+# it are keyed by a version token that changes whenever a Chief or
+# HistoricalEvent is written; entries of old versions expire after a day.
+TIMELINE_VERSION_KEY = 'timeline_version'
+TIMELINE_TIMEOUT = 60 * 60 * 24
+
+
+def timeline_version():
+    return _version(TIMELINE_VERSION_KEY)
+
+
+def timeline_cache_key(version, chief_slug):
+    return f'timeline:{version}:{chief_slug or "all"}'
+
+
+def invalidate_timeline():
+    delete_on_commit([TIMELINE_VERSION_KEY])
+
+
+# Product cards (core/templatetags/product_cards.py) are cached one per
+# product, keyed by what the card shows: a save moves updated_at, a bid moves
+# bid_count and current_bid, and a category rename changes the category name.
+# Nothing needs deleting; superseded cards simply expire. Bump
+# PRODUCT_CARD_VERSION when the markup of core/product_card.html changes.
+PRODUCT_CARD_VERSION = 1
+PRODUCT_CARD_TIMEOUT = 60 * 60 * 24
+
+# Cards and home fragments also embed <img> markup that depends on whether
+# an image's variants exist yet (core/images.py builds them in the
+# background). Writing variants drops the home fragments showing the model
+# and, for products, retires this version token, which every card key holds.
+IMAGE_VARIANTS_VERSION_KEY = 'image_variants_version'
+
+
+def image_variants_version():
+    return _version(IMAGE_VARIANTS_VERSION_KEY)
+
+
+def invalidate_image_markup(*models):
+    keys = [make_template_fragment_key(name) for model in models for name in sections_for(model)]
+    if Product in models:
+        keys.append(IMAGE_VARIANTS_VERSION_KEY)
+    delete_on_commit(keys)
+
+
+def product_card_key(product, variants_version=None):
+    state = ':'.join(map(str, (
+        product.updated_at.isoformat(), product.bid_count, product.current_bid,
+        product.category.name if product.category_id else '',
+        variants_version or image_variants_version(),
+    )))
+    digest = hashlib.md5(state.encode(), usedforsecurity=False).hexdigest()
+    return f'product_card:{PRODUCT_CARD_VERSION}:{product.pk}:{digest}'
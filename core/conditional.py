@@ -0,0 +1,103 @@
+"""Conditional GET for the detail pages.
+
+Each page has a validator that fetches, in one small query, the values its
+content is rendered from: the object's ``updated_at`` plus a summary of the
+related rows it lists. The ETag hashes those values together with the
+visitor's CSRF cookie (the forms embed a token derived from it), and the
+newest timestamp becomes Last-Modified. A matching ``If-None-Match`` or
+``If-Modified-Since`` is answered with 304 before the view runs.
+"""
+import datetime
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import Chief, Product, Project, TourismSite
+
+
+def chief_page(request, slug):
+    row = Chief.objects.filter(slug=slug).annotate(
+        events_updated=Max('events__updated_at'), event_count=Count('events'),
+    ).values_list('updated_at', 'events_updated', 'event_count').first()
+    return row and (max(filter(None, row[:2])), row)
+
+
+def tourism_page(request, slug):
+    updated_at = TourismSite.objects.filter(slug=slug, is_active=True).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    # The booking form's earliest selectable date is today
+    today = timezone.localdate()
+    midnight = timezone.make_aware(datetime.datetime.combine(today, datetime.time()))
+    return max(updated_at, midnight), (updated_at, today)
+
+
+def product_page(request, slug):
+    row = Product.objects.filter(slug=slug).annotate(
+        last_bid=Max('bids__created_at'), bids_listed=Count('bids'),
+    ).values_list('updated_at', 'last_bid', 'bids_listed').first()
+    return row and (max(filter(None, row[:2])), row)
+
+
+def project_page(request, slug):
+    updated_at = Project.objects.filter(slug=slug).values_list('updated_at', flat=True).first()
+    return updated_at and (updated_at, (updated_at,))
+
+
+def conditional_page(validator):
+    """Answer GET/HEAD with 304 Not Modified while ``validator``'s values are unchanged.
+
+    ``validator(request, *args, **kwargs)`` returns ``(last_modified, values)``,
+    or None when the object does not exist (the view then renders its 404).
+    Works on both sync and async views.
+    """
+    def check(request, validators):
+        # Pending flash messages are part of the page but not of the
+        # validators; len() reads them without marking them as shown.
+        if validators is None or len(get_messages(request)):
+            return None, None, None
+        last_modified, values = validators
+        csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        etag = quote_etag(hashlib.sha1(repr((values, csrf_cookie)).encode()).hexdigest())
+        last_modified = int(last_modified.timestamp())
+        return etag, last_modified, get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def finish(response, etag, last_modified):
+        if etag and response.status_code in (200, 304):
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+            # Always revalidate: a bid or an edit must show up on the next visit
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                validators = await sync_to_async(validator)(request, *args, **kwargs)
+                etag, last_modified, response = await sync_to_async(check)(request, validators)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return finish(response, etag, last_modified)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag, last_modified, response = check(request, validator(request, *args, **kwargs))
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return finish(response, etag, last_modified)
+        return wrapper
+
+    return decorator
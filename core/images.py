@@ -0,0 +1,181 @@
+"""Responsive image derivatives for static and uploaded images.
+
+Every source image gets resized WebP and JPEG copies under
+``MEDIA_ROOT/variants/`` with the source's content hash in their names, so
+they can be cached forever. A JSON sidecar next to them records the
+variants and is what the ``responsive_images`` template tags read.
+
+Uploaded images are resized on a background thread (``variant_builder``)
+once the upload commits; until then the tags fall back to the original.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.templatetags.static import static
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (320, 640, 960, 1280)
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 78, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 80, 'optimize': True, 'progressive': True},
+}
+VARIANTS_DIR = 'variants'
+STATIC_IMAGE_DIRS = ('historical', 'products', 'projects')
+IMAGE_EXTENSIONS = ('.jpeg', '.jpg', '.png')
+
+_sidecar_cache = {}
+
+
+def variants_root():
+    return Path(settings.MEDIA_ROOT) / VARIANTS_DIR
+
+
+def source_for(image):
+    """Return ``(key, path, fallback_url)`` for a static path or an ImageField file"""
+    if isinstance(image, str):
+        return f'static/{image}', finders.find(image), static(image)
+    return f'media/{image.name}', image.path, image.url
+
+
+def sidecar_path(key):
+    return variants_root() / f'{key}.json'
+
+
+def build_variants(key, path, force=False):
+    """Write the derivatives for the image at ``path``; returns the sidecar data"""
+    from PIL import Image, ImageOps
+
+    with open(path, 'rb') as source:
+        digest = hashlib.sha256(source.read()).hexdigest()[:12]
+
+    existing = read_sidecar(key)
+    if existing and existing['hash'] == digest and not force:
+        return existing
+
+    stem = Path(key).with_suffix('')
+    target_dir = variants_root() / stem.parent
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(path) as opened:
+        image = ImageOps.exif_transpose(opened).convert('RGB')
+    width, height = image.size
+    widths = [w for w in WIDTHS if w < width] + [width]
+
+    variants = {name: [] for name in FORMATS}
+    for w in widths:
+        resized = image if w == width else image.resize((w, round(height * w / width)), Image.LANCZOS)
+        for name, options in FORMATS.items():
+            filename = f'{stem.name}-{digest}-{w}.{name}'
+            resized.save(target_dir / filename, **options)
+            variants[name].append([w, f'{VARIANTS_DIR}/{stem.parent.as_posix()}/{filename}'])
+
+    data = {'hash': digest, 'width': width, 'height': height, 'variants': variants}
+    sidecar = sidecar_path(key)
+    tmp = sidecar.with_suffix('.tmp')
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, sidecar)
+    return data
+
+
+def read_sidecar(key):
+    """Sidecar data for ``key`` or None, cached until the file changes"""
+    path = sidecar_path(key)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    cached = _sidecar_cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    data = json.loads(path.read_text())
+    _sidecar_cache[key] = (mtime, data)
+    return data
+
+
+def variant_url(relative):
+    return default_storage.url(relative)
+
+
+def static_images():
+    """Static image paths (relative to the static root) worth deriving"""
+    for directory in STATIC_IMAGE_DIRS:
+        for finder in finders.get_finders():
+            for path, storage in finder.list([]):
+                if path.startswith(f'{directory}/') and path.lower().endswith(IMAGE_EXTENSIONS):
+                    yield path
+
+
+class VariantBuilder:
+    """Images waiting for their variants, built by a daemon thread.
+
+    ``on_built`` runs once an image's variants are written, to retire
+    markup cached while only the fallback existed. Images still waiting
+    when the process exits are left to ``manage.py build_image_variants``.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.building = threading.Lock()
+        self.pending = {}  # key -> (path, on_built)
+        self.pid = None
+
+    def submit(self, key, path, on_built=None):
+        with self.condition:
+            if self.pid != os.getpid():
+                # First use in this process, or a forked worker: what the
+                # parent queued is the parent's to build
+                self.pid = os.getpid()
+                self.pending.clear()
+                threading.Thread(target=self._run, name='image-variants', daemon=True).start()
+            self.pending[key] = (path, on_built)
+            self.condition.notify()
+
+    def flush(self):
+        """Build every pending image now; returns how many were built"""
+        built = 0
+        with self.building:
+            while True:
+                with self.condition:
+                    if not self.pending:
+                        return built
+                    key = next(iter(self.pending))
+                    path, on_built = self.pending.pop(key)
+                try:
+                    build_variants(key, path)
+                except (OSError, ValueError):
+                    logger.warning('Could not build image variants for %s', key, exc_info=True)
+                    continue
+                built += 1
+                if on_built:
+                    on_built()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending)
+            self.flush()
+
+
+variant_builder = VariantBuilder()
+
+
+def build_for_instance(instance, field_name='image', on_built=None):
+    """Upload hook: queue variants for a model instance's image, if it has none yet"""
+    image = getattr(instance, field_name)
+    if not image:
+        return
+    key, path, _ = source_for(image)
+    # Storage never overwrites an upload, so a file name that has a sidecar
+    # already has all its variants: re-saving the instance costs one stat()
+    if read_sidecar(key) is not None:
+        return
+    transaction.on_commit(lambda: variant_builder.submit(key, path, on_built))
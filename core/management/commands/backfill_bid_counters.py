@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Subquery
+from django.db.models.functions import Coalesce
+from core.models import Product, bid_totals
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Product.bid_count and Product.current_bid from existing bids'
+
+    def handle(self, *args, **options):
+        bid_count, highest_bid = bid_totals()
+
+        with transaction.atomic():
+            updated = Product.objects.update(
+                bid_count=Coalesce(Subquery(bid_count), 0),
+                current_bid=Coalesce(Subquery(highest_bid), F('current_bid')),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'[OK] Backfilled bid counters for {updated} products'))
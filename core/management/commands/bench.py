@@ -0,0 +1,214 @@
+import itertools
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+from io import StringIO
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from core import urls as core_urls
+from core.models import Booking, Chief, Product, Project, TourismSite
+
+BENCH_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+METRICS_TOKEN = 'bench'
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks every route in core/urls.py against a freshly seeded throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=0, help='seed_data --scale for the dataset')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per route first')
+        parser.add_argument('--memory-iterations', type=int, default=5,
+                            help='Extra requests per route traced for allocated memory')
+        parser.add_argument('--route', action='append', help='Only run routes whose label contains this')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Compare against results saved earlier with --output')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Relative p95 slowdown that counts as a regression (default 0.2)')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 2:
+            raise CommandError('--iterations must be at least 2')
+
+        # Seed and measure inside a test database, so the real one is untouched
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=BENCH_CACHES, METRICS_TOKEN=METRICS_TOKEN):
+                started = time.perf_counter()
+                call_command('seed_data', scale=options['scale'], stdout=StringIO())
+                self.stdout.write(f'  Seeded scale {options["scale"]} in {time.perf_counter() - started:.1f}s')
+                routes = self.measure(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        results = {
+            'meta': {
+                'scale': options['scale'],
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'routes': routes,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f'[OK] Results written to {options["output"]}'))
+        if options['baseline']:
+            self.compare(routes, options['baseline'], options['threshold'])
+
+    def scenarios(self):
+        """(label, method, url, data) for every route; ``data`` is built per request"""
+        chief = Chief.objects.order_by('position').first()
+        site = TourismSite.objects.filter(is_active=True).first()
+        product = Product.objects.filter(status='bidding').first()
+        project = Project.objects.first()
+        booking = Booking.objects.first()
+        counter = itertools.count(1)
+        minimum = product.current_bid or product.starting_bid or product.price
+
+        def bid():
+            return {
+                'bidder_name': 'Bench Bidder', 'bidder_email': 'bench@example.com',
+                'bidder_phone': '+255710000000', 'bid_amount': str(minimum + next(counter)),
+            }
+
+        def booking_form():
+            return {
+                'visitor_name': 'Bench Visitor', 'visitor_email': 'bench@example.com',
+                'visitor_phone': '+255710000000', 'visitor_type': 'local', 'number_of_visitors': 1,
+                'visit_date': (date.today() + timedelta(days=1 + next(counter) % 365)).isoformat(),
+                'visit_time': '10:00',
+            }
+
+        def contact_form():
+            return {'name': 'Bench', 'email': 'bench@example.com', 'subject': 'Bench', 'message': 'Timing run'}
+
+        def subscription():
+            return {'email': f'bench{next(counter)}@example.com', 'name': 'Bench'}
+
+        return [
+            ('home', 'get', reverse('home'), None),
+            ('heritage', 'get', reverse('heritage'), None),
+            ('chief_detail', 'get', reverse('chief_detail', args=[chief.slug]), None),
+            ('tourism', 'get', reverse('tourism'), None),
+            ('tourism_availability', 'get', reverse('tourism_availability'), None),
+            ('tourism_detail', 'get', reverse('tourism_detail', args=[site.slug]), None),
+            ('tourism_detail POST', 'post', reverse('tourism_detail', args=[site.slug]), booking_form),
+            ('site_availability', 'get', reverse('site_availability', args=[site.slug]), None),
+            ('booking_confirmation', 'get', reverse('booking_confirmation', args=[booking.booking_reference]), None),
+            ('products', 'get', reverse('products'), None),
+            ('products search', 'get', reverse('products') + '?search=carving', None),
+            ('product_detail', 'get', reverse('product_detail', args=[product.slug]), None),
+            ('product_detail POST', 'post', reverse('product_detail', args=[product.slug]), bid),
+            ('projects', 'get', reverse('projects'), None),
+            ('project_detail', 'get', reverse('project_detail', args=[project.slug]), None),
+            ('contact', 'get', reverse('contact'), None),
+            ('contact POST', 'post', reverse('contact'), contact_form),
+            ('newsletter_subscribe POST', 'post', reverse('newsletter_subscribe'), subscription),
+            ('performance_metrics', 'get', reverse('performance_metrics'), None),
+        ]
+
+    def measure(self, options):
+        scenarios = self.scenarios()
+        covered = {label.split()[0] for label, *_ in scenarios}
+        for pattern in core_urls.urlpatterns:
+            if pattern.name not in covered:
+                self.stdout.write(self.style.WARNING(f'  No benchmark for route {pattern.name!r}'))
+        if options['route']:
+            scenarios = [s for s in scenarios if any(part in s[0] for part in options['route'])]
+
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}')
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries[-1] += 1
+            return execute(sql, params, many, context)
+
+        def request(method, url, data):
+            queries.append(0)
+            return getattr(client, method)(url, data() if data else None)
+
+        self.stdout.write(
+            f'\n  {"route":<28}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}{"alloc KiB":>11}'
+        )
+        routes = {}
+        with connection.execute_wrapper(count_query):
+            for label, method, url, data in scenarios:
+                for _ in range(options['warmup']):
+                    request(method, url, data)
+
+                queries.clear()
+                timings = []
+                for _ in range(options['iterations']):
+                    started = time.perf_counter()
+                    response = request(method, url, data)
+                    timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    self.stdout.write(self.style.ERROR(f'  {label}: HTTP {response.status_code}'))
+
+                # Traced separately: tracemalloc slows every allocation down
+                allocated = []
+                tracemalloc.start()
+                for _ in range(options['memory_iterations']):
+                    tracemalloc.reset_peak()
+                    before = tracemalloc.get_traced_memory()[0]
+                    request(method, url, data)
+                    allocated.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+                tracemalloc.stop()
+
+                cuts = statistics.quantiles(timings, n=100, method='inclusive')
+                routes[label] = {
+                    'status': response.status_code,
+                    'p50_ms': round(cuts[49], 3),
+                    'p95_ms': round(cuts[94], 3),
+                    'p99_ms': round(cuts[98], 3),
+                    'mean_ms': round(statistics.fmean(timings), 3),
+                    'queries': round(statistics.fmean(queries[:options['iterations']]), 2),
+                    'alloc_kib': round(statistics.median(allocated), 1) if allocated else None,
+                }
+                row = routes[label]
+                self.stdout.write(
+                    f'  {label:<28}{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}{row["p99_ms"]:>9.2f}'
+                    f'{row["queries"]:>9.1f}{row["alloc_kib"] or 0:>11.1f}'
+                )
+        return routes
+
+    def compare(self, routes, path, threshold):
+        with open(path) as fh:
+            baseline = json.load(fh)['routes']
+
+        self.stdout.write(f'\n  {"route":<28}{"p95 before":>12}{"p95 now":>10}{"change":>9}{"queries":>12}')
+        regressions = []
+        for label, row in routes.items():
+            before = baseline.get(label)
+            if before is None:
+                self.stdout.write(f'  {label:<28}{"(new)":>12}')
+                continue
+            change = row['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0
+            slower = change > threshold
+            more_queries = row['queries'] > before['queries']
+            line = (
+                f'  {label:<28}{before["p95_ms"]:>12.2f}{row["p95_ms"]:>10.2f}{change:>+9.0%}'
+                f'{before["queries"]:>6.1f} ->{row["queries"]:>4.1f}'
+            )
+            if slower or more_queries:
+                regressions.append(label)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f'Regressed against {path}: {", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS(f'[OK] No regressions against {path}'))
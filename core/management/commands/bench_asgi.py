@@ -0,0 +1,126 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from wsgiref.util import setup_testing_defaults
+
+from django.core.asgi import get_asgi_application
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.urls import reverse
+from core.models import Chief, Product, Project, TourismSite
+
+BENCH_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Compares concurrent throughput of the read-only pages under WSGI (threads) and ASGI (async views)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=0, help='seed_data --scale for the dataset')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per run')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32],
+                            help='Concurrent connections to compare')
+
+    def handle(self, *args, **options):
+        # The in-memory test database is shared between threads, which both
+        # the WSGI worker threads and the ASGI sync_to_async threads need.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=BENCH_CACHES, SERVER_TIMING=False):
+                call_command('seed_data', scale=options['scale'], stdout=StringIO())
+                urls = self.urls()
+                runs = [
+                    ('wsgi', 'settings.urls', self.run_wsgi),
+                    ('asgi', 'settings.asgi_urls', self.run_asgi),
+                ]
+                self.stdout.write(f'\n  {"server":<8}{"conns":>6}{"req/s":>10}{"p50 ms":>9}{"p95 ms":>9}')
+                for concurrency in options['concurrency']:
+                    for server, urlconf, run in runs:
+                        with override_settings(ROOT_URLCONF=urlconf):
+                            run(urls[:4], concurrency)  # warm up
+                            plan = [urls[i % len(urls)] for i in range(options['requests'])]
+                            started = time.perf_counter()
+                            latencies = run(plan, concurrency)
+                            elapsed = time.perf_counter() - started
+                        cuts = statistics.quantiles(latencies, n=20, method='inclusive')
+                        self.stdout.write(
+                            f'  {server:<8}{concurrency:>6}{len(plan) / elapsed:>10.0f}'
+                            f'{statistics.median(latencies):>9.2f}{cuts[18]:>9.2f}'
+                        )
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def urls(self):
+        return [
+            reverse('home'),
+            reverse('heritage'),
+            reverse('chief_detail', args=[Chief.objects.order_by('position').first().slug]),
+            reverse('tourism'),
+            reverse('tourism_detail', args=[TourismSite.objects.first().slug]),
+            reverse('products'),
+            reverse('products') + '?search=carving',
+            reverse('product_detail', args=[Product.objects.filter(status='bidding').first().slug]),
+            reverse('projects'),
+            reverse('project_detail', args=[Project.objects.first().slug]),
+        ]
+
+    def run_wsgi(self, plan, concurrency):
+        """Like a threaded WSGI server with ``concurrency`` worker threads"""
+        application = get_wsgi_application()
+
+        def request(url):
+            path, _, query = url.partition('?')
+            environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_HOST': 'testserver'}
+            setup_testing_defaults(environ)
+            started = time.perf_counter()
+            body = application(environ, lambda status, headers: None)
+            b''.join(body)
+            body.close()
+            return (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            return list(pool.map(request, plan))
+
+    def run_asgi(self, plan, concurrency):
+        """Like an ASGI server holding ``concurrency`` connections open"""
+        application = get_asgi_application()
+
+        async def request(url):
+            path, _, query = url.partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': query.encode(), 'headers': [(b'host', b'testserver')],
+                'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            }
+            done = asyncio.Event()
+
+            async def receive():
+                if not done.is_set():
+                    done.set()
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await asyncio.Future()  # the client never disconnects
+
+            async def send(message):
+                pass
+
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            return (time.perf_counter() - started) * 1000
+
+        async def connection_loop(queue, latencies):
+            while queue:
+                latencies.append(await request(queue.pop()))
+
+        async def main():
+            queue, latencies = list(reversed(plan)), []
+            await asyncio.gather(*(connection_loop(queue, latencies) for _ in range(concurrency)))
+            return latencies
+
+        return asyncio.run(main())
@@ -0,0 +1,92 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.db.models import Max
+from core.bidding import BidRejected, place_bid
+from core.models import Product, ProductCategory, Bid
+
+
+class Command(BaseCommand):
+    help = 'Runs a threaded "bid storm" against one product and checks there is a single winner'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent bidders')
+        parser.add_argument('--bids', type=int, default=200, help='Bids submitted per bidder')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark product afterwards')
+
+    def handle(self, *args, **options):
+        category, _ = ProductCategory.objects.get_or_create(slug='bench', defaults={'name': 'Bench'})
+        product = Product.objects.create(
+            name=f'Bid storm {time.time_ns()}',
+            category=category,
+            description='Benchmark product',
+            product_type='physical',
+            price=Decimal('100.00'),
+            starting_bid=Decimal('100.00'),
+            status='bidding',
+            artist_name='Benchmark',
+        )
+
+        counts = {'accepted': 0, 'rejected': 0, 'locked': 0}
+        lock = threading.Lock()
+        start = threading.Barrier(options['threads'] + 1)
+
+        def bidder(n):
+            rng = random.Random(n)
+            amount = Decimal('100.00')
+            local = dict.fromkeys(counts, 0)
+            start.wait()
+            try:
+                for _ in range(options['bids']):
+                    amount += Decimal(rng.randint(1, 500)) / 100
+                    try:
+                        place_bid(product, f'Bidder {n}', f'bidder{n}@example.com', '+255710000000', amount)
+                        local['accepted'] += 1
+                    except BidRejected as exc:
+                        local['rejected'] += 1
+                        amount = max(amount, exc.minimum)
+                    except OperationalError:
+                        local['locked'] += 1
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in local.items():
+                        counts[key] += value
+
+        workers = [threading.Thread(target=bidder, args=(n,)) for n in range(options['threads'])]
+        for worker in workers:
+            worker.start()
+        start.wait()
+        began = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - began
+
+        product.refresh_from_db()
+        bids = Bid.objects.filter(product=product)
+        winners = bids.filter(is_winning=True).count()
+        highest = bids.aggregate(highest=Max('bid_amount'))['highest']
+
+        self.stdout.write(f'  Bidders: {options["threads"]} x {options["bids"]} bids in {elapsed:.2f}s')
+        self.stdout.write(f'  Accepted: {counts["accepted"]} ({counts["accepted"] / elapsed:.0f} bids/s)')
+        self.stdout.write(f'  Rejected (outbid): {counts["rejected"]}')
+        self.stdout.write(f'  Failed (database locked): {counts["locked"]}')
+        self.stdout.write(f'  Winning bids: {winners}, bid_count: {product.bid_count}, current_bid: {product.current_bid}')
+
+        consistent = (
+            winners == (1 if counts['accepted'] else 0)
+            and product.bid_count == counts['accepted'] == bids.count()
+            and product.current_bid == (highest or product.starting_bid)
+        )
+
+        if not options['keep']:
+            product.delete()
+
+        if consistent:
+            self.stdout.write(self.style.SUCCESS('[OK] No double winners'))
+        else:
+            self.stdout.write(self.style.ERROR('[FAIL] Bid state is inconsistent'))
@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+from core.caching import image_variants_version, product_card_key
+from core.management.synthetic import create_bench_products, drop_bench_products
+from core.metrics import registry
+from core.models import Product
+from core.templatetags.product_cards import CARD_TEMPLATE
+
+SIZES = (12, 48)
+
+
+class Command(BaseCommand):
+    help = 'Times product listing cards rendered inline, from a cold card cache and from a warm one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic products afterwards')
+
+    def handle(self, *args, **options):
+        category, _ = create_bench_products('bench-cards', max(SIZES))
+        card = get_template(CARD_TEMPLATE)
+        # The listing as it was before the card cache: the card markup inline in the loop
+        source = card.template.source.replace('{% load responsive_images %}', '', 1)
+        inline = card.backend.from_string('{% load responsive_images %}{% for product in products %}' + source + '{% endfor %}')
+        cached = card.backend.from_string('{% load product_cards %}{% product_cards products %}')
+
+        self.stdout.write(f'  Cache backend: {settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1]}')
+        self.stdout.write(f'\n  {"cards":>6}{"inline ms":>12}{"cold ms":>10}{"warm ms":>10}{"saved":>9}')
+        registry.reset()
+        for size in SIZES:
+            products = list(Product.objects.select_related('category').filter(category=category)[:size])
+            version = image_variants_version()
+            keys = [product_card_key(product, version) for product in products]
+            context = {'products': products}
+
+            inline_ms = self.time(lambda: inline.render(context), options['repeat'])
+
+            def cold():
+                cache.delete_many(keys)
+                started = time.perf_counter()
+                cached.render(context)
+                return time.perf_counter() - started
+
+            cold_ms = statistics.median(cold() for _ in range(options['repeat'])) * 1000
+            warm_ms = self.time(lambda: cached.render(context), options['repeat'])
+            self.stdout.write(
+                f'  {size:>6}{inline_ms:>12.2f}{cold_ms:>10.2f}{warm_ms:>10.2f}{1 - warm_ms / inline_ms:>9.0%}'
+            )
+            cache.delete_many(keys)
+
+        ratio = registry.fragment_snapshot()['product_card']
+        self.stdout.write(f'\n  Card cache: {ratio["hits"]} hits, {ratio["misses"]} misses over the runs above')
+        registry.reset()
+        if not options['keep']:
+            drop_bench_products(category)
+
+    def time(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,76 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PAGES = ['home', 'products', 'heritage', 'contact']
+
+
+def measure(pages):
+    """Run in a fresh process: start the WSGI application, then time each page's first and second request"""
+    started = time.perf_counter()
+    import settings.wsgi  # noqa: F401
+    startup_ms = (time.perf_counter() - started) * 1000
+
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    results = {'startup': startup_ms}
+    for page in pages:
+        timings = []
+        for _ in range(2):
+            started = time.perf_counter()
+            response = client.get(reverse(page))
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{page} answered {response.status_code}')
+        results[page] = timings
+    print(json.dumps(results))
+
+
+class Command(BaseCommand):
+    help = 'Times worker startup and the first request to each page, with and without the template warmup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh processes per mode')
+
+    def handle(self, *args, **options):
+        runs = {'cold': [], 'warm': []}
+        for _ in range(options['runs']):
+            for mode in runs:
+                runs[mode].append(self.run_child(warmup=mode == 'warm'))
+
+        def median(mode, page, index=None):
+            values = [run[page] if index is None else run[page][index] for run in runs[mode]]
+            return statistics.median(values)
+
+        self.stdout.write(
+            f'  worker startup: {median("cold", "startup"):.0f} ms without warmup, '
+            f'{median("warm", "startup"):.0f} ms with it\n'
+        )
+        self.stdout.write(f'  {"page":<12}{"first, cold":>13}{"first, warm":>13}{"second":>9}')
+        for page in PAGES:
+            self.stdout.write(
+                f'  {page:<12}{median("cold", page, 0):>10.1f} ms{median("warm", page, 0):>10.1f} ms'
+                f'{median("warm", page, 1):>6.1f} ms'
+            )
+
+    def run_child(self, warmup):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'settings.settings'),
+            'DJANGO_TEMPLATE_WARMUP': '1' if warmup else '0',
+        }
+        code = f'from core.management.commands.bench_first_request import measure; measure({PAGES!r})'
+        child = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if child.returncode:
+            raise CommandError(child.stderr.strip().splitlines()[-1])
+        return json.loads(child.stdout.splitlines()[-1])
@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.core.paginator import Paginator
+from django.core.management.base import BaseCommand
+from core.management.synthetic import create_bench_products, drop_bench_products
+from core.models import Product
+from core.pagination import ORDERING, encode_cursor, paginate_by_cursor
+
+PER_PAGE = 12
+
+
+class Command(BaseCommand):
+    help = 'Compares OFFSET and cursor pagination of the products catalog at depth'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000, help='Synthetic products to create')
+        parser.add_argument('--page', type=int, default=5000, help='Deep page to compare against page 1')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic products afterwards')
+
+    def handle(self, *args, **options):
+        category, seconds = create_bench_products('bench-pagination', options['products'])
+        self.stdout.write(f'  Created {options["products"]} products in {seconds:.1f}s')
+        catalog = Product.objects.select_related('category').exclude(status='sold')
+        deep = options['page']
+
+        # The cursor a visitor would hold after clicking "Next" deep - 1 times
+        anchor = catalog.order_by(*ORDERING)[(deep - 1) * PER_PAGE - 1]
+        deep_cursor = encode_cursor(anchor, 'next')
+
+        def offset(number):
+            def run():
+                page = Paginator(catalog, PER_PAGE).get_page(number)
+                page.paginator.count
+                return list(page)
+            return run
+
+        def cursor(token):
+            return lambda: list(paginate_by_cursor(catalog, token, PER_PAGE))
+
+        rows = [
+            ('offset', 1, offset(1)),
+            ('offset', deep, offset(deep)),
+            ('cursor', 1, cursor(None)),
+            ('cursor', deep, cursor(deep_cursor)),
+        ]
+        self.stdout.write(f'\n  {"mode":<10}{"page":>8}{"ms":>10}')
+        results = {}
+        for mode, number, run in rows:
+            first = run()
+            results[mode, number] = [p.pk for p in first]
+            self.stdout.write(f'  {mode:<10}{number:>8}{self.time(run, options["repeat"]):>10.2f}')
+
+        if results['offset', deep] != results['cursor', deep]:
+            self.stdout.write(self.style.WARNING('  Offset and cursor pages differ (ties in created_at?)'))
+
+        if not options['keep']:
+            drop_bench_products(category)
+
+    def time(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
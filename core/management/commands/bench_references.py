@@ -0,0 +1,64 @@
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from core.references import BlockSequence, format_reference, is_valid
+
+
+def generate(count, block_size):
+    sequence = BlockSequence('booking_reference', block_size)
+    references = [format_reference(sequence.take()[0]) for _ in range(count)]
+    connections.close_all()
+    return references
+
+
+class Command(BaseCommand):
+    help = 'Generates booking references from several processes at once and checks they are all unique'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1_000_000, help='References to generate in total')
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--block-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark creates a throwaway SQLite database')
+        count, processes, block_size = options['count'], options['processes'], options['block_size']
+
+        db = connections.settings['default']
+        saved_name = db['NAME']
+        with tempfile.TemporaryDirectory() as tmp:
+            # A file database the worker processes can all open
+            db['TEST']['NAME'] = os.path.join(tmp, 'references.sqlite3')
+            try:
+                connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                connections.close_all()
+                share = [count // processes + (n < count % processes) for n in range(processes)]
+                started = time.perf_counter()
+                with multiprocessing.get_context('fork').Pool(processes) as pool:
+                    batches = pool.starmap(generate, [(n, block_size) for n in share])
+                elapsed = time.perf_counter() - started
+            finally:
+                db['NAME'] = saved_name
+                db['TEST'].pop('NAME')
+                connections.close_all()
+
+        references = [reference for batch in batches for reference in batch]
+        duplicates = len(references) - len(set(references))
+        invalid = sum(not is_valid(reference) for reference in references)
+        legacy = [f'MKW{uuid.uuid4().hex[:8].upper()}' for _ in range(count)]
+
+        self.stdout.write(
+            f'  {len(references)} references from {processes} processes in {elapsed:.1f}s '
+            f'({len(references) / elapsed:,.0f}/s, {-(-count // block_size)} block reservations)\n'
+            f'  duplicates: {duplicates}, failing the check symbol: {invalid}, '
+            f'longest: {max(map(len, references))} characters\n'
+            f'  uuid4().hex[:8] duplicates over the same count: {len(legacy) - len(set(legacy))}'
+        )
+        if duplicates or invalid:
+            raise CommandError('Reference allocation produced duplicate or invalid references')
+        self.stdout.write(self.style.SUCCESS('[OK] All references unique and valid'))
@@ -0,0 +1,57 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from core import search
+from core.management.synthetic import create_bench_products, drop_bench_products
+from core.models import Product
+
+QUERIES = ['spear', 'royal carving', 'kimayu', 'anc', 'lugalo sunset portrait', 'zzznomatch']
+
+
+class Command(BaseCommand):
+    help = 'Compares LIKE and FTS5 product search on a synthetic catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000, help='Synthetic products to create')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query and path')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic products afterwards')
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('FTS5 search is only available on SQLite')
+
+        category, seconds = create_bench_products('bench-search', options['products'])
+        self.stdout.write(f'  Created {options["products"]} products in {seconds:.1f}s')
+        catalog = Product.objects.filter(category=category).exclude(status='sold')
+
+        def like(term):
+            return catalog.filter(
+                Q(name__icontains=term) | Q(description__icontains=term) | Q(artist_name__icontains=term)
+            )
+
+        def fts(term):
+            return search.search_products(catalog, term)
+
+        self.stdout.write(f'\n  {"query":<26}{"matches":>9}{"LIKE ms":>11}{"FTS5 ms":>11}{"speedup":>10}')
+        for term in QUERIES:
+            like_ms, matches = self.time_page(like, term, options['repeat'])
+            fts_ms, _ = self.time_page(fts, term, options['repeat'])
+            self.stdout.write(
+                f'  {term:<26}{matches:>9}{like_ms:>11.2f}{fts_ms:>11.2f}{like_ms / fts_ms:>9.1f}x'
+            )
+
+        if not options['keep']:
+            drop_bench_products(category)
+
+    def time_page(self, build, term, repeat):
+        # Mirror products_view: a COUNT for the paginator plus the first page.
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = build(term)
+            matches = queryset.count()
+            list(queryset[:12])
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), matches
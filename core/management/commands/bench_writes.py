@@ -0,0 +1,155 @@
+import itertools
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from core.models import Product, TourismSite
+
+BENCH_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# What DATABASES and SQLITE_PRAGMAS looked like before the production profile
+PROFILES = {
+    'before': {'options': {}, 'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'}},
+    'after': None,  # the current settings
+}
+
+
+class Command(BaseCommand):
+    help = 'Counts concurrent booking, bid and contact writes that succeed with the old and new SQLite profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, nargs='+', default=[4, 16, 32], help='Concurrent writer threads')
+        parser.add_argument('--writes', type=int, default=25, help='POSTs per writer')
+        parser.add_argument('--readers', type=int, default=4, help='Threads reading pages meanwhile')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stderr.write('This benchmark is only meaningful on SQLite')
+            return
+
+        self.stdout.write(
+            f'\n  {"profile":<9}{"writers":>8}{"ok":>7}{"locked":>8}{"other":>7}{"writes/s":>10}{"reads/s":>9}'
+        )
+        # Failed writes are counted below, not logged with a traceback each
+        logger = logging.getLogger('django.request')
+        level = logger.level
+        logger.setLevel(logging.CRITICAL)
+        try:
+            for writers in options['writers']:
+                for profile in PROFILES:
+                    self.run_profile(profile, writers, options)
+        finally:
+            logger.setLevel(level)
+
+    def run_profile(self, profile, writers, options):
+        db = connections.settings['default']
+        saved = db['OPTIONS'], db['NAME']
+        with tempfile.TemporaryDirectory() as tmp:
+            # A file database, as in production; the in-memory test database
+            # has no journal and no file locks to contend on.
+            db['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+            overrides = {'CACHES': BENCH_CACHES}
+            if PROFILES[profile]:
+                db['OPTIONS'] = PROFILES[profile]['options']
+                overrides['SQLITE_PRAGMAS'] = PROFILES[profile]['pragmas']
+            try:
+                with override_settings(**overrides):
+                    connections.close_all()
+                    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                    call_command('seed_data', stdout=StringIO())
+                    result = self.contend(writers, options)
+                    connections.close_all()
+            finally:
+                db['OPTIONS'], db['NAME'] = saved
+                db['TEST'].pop('NAME')
+                connections.close_all()
+
+        self.stdout.write(
+            f'  {profile:<9}{writers:>8}{result["ok"]:>7}{result["locked"]:>8}{result["other"]:>7}'
+            f'{result["ok"] / result["seconds"]:>10.0f}{result["reads"] / result["seconds"]:>9.0f}'
+        )
+
+    def contend(self, writers, options):
+        site = TourismSite.objects.filter(is_active=True).first()
+        product = Product.objects.filter(status='bidding').first()
+        site_url = reverse('tourism_detail', args=[site.slug])
+        product_url = reverse('product_detail', args=[product.slug])
+        read_urls = [product_url, site_url, reverse('products')]
+        amounts = itertools.count(int(product.current_bid or product.price) + 1)
+        result = {'ok': 0, 'locked': 0, 'other': 0, 'reads': 0}
+        lock = threading.Lock()
+        writing = threading.Event()
+        writing.set()
+        barrier = threading.Barrier(writers + options['readers'])
+
+        def posts(n):
+            visit_date = date.today() + timedelta(days=1 + n % 200)
+            yield site_url, {
+                'visitor_name': 'Load Test', 'visitor_email': 'load@example.com', 'visitor_phone': '+255',
+                'visitor_type': 'local', 'number_of_visitors': 1, 'visit_date': visit_date.isoformat(),
+                'visit_time': '10:00',
+            }
+            yield product_url, {
+                'bidder_name': 'Load Test', 'bidder_email': 'load@example.com', 'bidder_phone': '+255',
+                'bid_amount': str(next(amounts)),
+            }
+            yield reverse('contact'), {'name': 'Load', 'email': 'load@example.com', 'subject': 'Load', 'message': '-'}
+
+        def writer(number):
+            client = Client()
+            barrier.wait()
+            try:
+                for i in range(options['writes']):
+                    url, data = list(posts(number * options['writes'] + i))[i % 3]
+                    try:
+                        client.post(url, data)
+                        outcome = 'ok'
+                    except OperationalError as exc:
+                        outcome = 'locked' if 'locked' in str(exc) else 'other'
+                    except Exception:
+                        outcome = 'other'
+                    with lock:
+                        result[outcome] += 1
+            finally:
+                connections.close_all()
+
+        def reader():
+            client = Client()
+            barrier.wait()
+            reads = 0
+            try:
+                for url in itertools.cycle(read_urls):
+                    if not writing.is_set():
+                        break
+                    try:
+                        client.get(url)
+                        reads += 1
+                    except OperationalError:
+                        pass
+            finally:
+                with lock:
+                    result['reads'] += reads
+                connections.close_all()
+
+        readers = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        workers = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        for thread in readers + workers:
+            thread.start()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        result['seconds'] = time.perf_counter() - started
+        writing.clear()
+        for thread in readers:
+            thread.join()
+        return result
@@ -0,0 +1,44 @@
+import os
+
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from core import images
+from core.caching import HOME_SECTIONS, invalidate_image_markup
+from core.models import Chief, TourismSite, Product, Project
+
+
+class Command(BaseCommand):
+    help = 'Builds resized WebP/JPEG variants for static and uploaded images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild variants that are already up to date')
+
+    def handle(self, *args, **options):
+        sources = [(f'static/{path}', finders.find(path)) for path in sorted(set(images.static_images()))]
+        for model in (Chief, TourismSite, Product, Project):
+            for instance in model.objects.exclude(image='').exclude(image__isnull=True).only('image'):
+                key, path, _ = images.source_for(instance.image)
+                if os.path.exists(path):
+                    sources.append((key, path))
+
+        original_total = variant_total = 0
+        for key, path in sources:
+            data = images.build_variants(key, path, force=options['force'])
+            original = os.path.getsize(path)
+            # The browser fetches roughly one mid-sized WebP per card
+            webp = next((p for w, p in data['variants']['webp'] if w >= 640), data['variants']['webp'][-1][1])
+            variant = os.path.getsize(images.variants_root().parent / webp)
+            original_total += original
+            variant_total += variant
+            self.stdout.write(f'  [+] {key}: {original // 1024} KB -> {variant // 1024} KB')
+
+        # Cached cards and home page fragments still hold the old <img> markup
+        invalidate_image_markup(*{model for models in HOME_SECTIONS.values() for model in models})
+
+        if sources:
+            self.stdout.write(self.style.SUCCESS(
+                f'[OK] {len(sources)} images: {original_total // 1024} KB -> {variant_total // 1024} KB '
+                f'({variant_total / original_total:.0%}) at 640px WebP'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('[OK] No images found'))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from core.exports import BOOKING_COLUMNS, booking_rows, csv_lines
+from core.models import Booking
+
+
+def date_arg(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Streams bookings as CSV, filtered like the admin changelist'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--status', choices=[value for value, _ in Booking.STATUS_CHOICES])
+        parser.add_argument('--visitor-type', choices=['local', 'foreign'])
+        parser.add_argument('--site', help='Tourism site slug')
+        parser.add_argument('--from', dest='date_from', type=date_arg, help='First visit date, YYYY-MM-DD')
+        parser.add_argument('--to', dest='date_to', type=date_arg, help='Last visit date, YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        bookings = Booking.objects.order_by('visit_date', 'pk')
+        filters = {
+            'status': options['status'],
+            'visitor_type': options['visitor_type'],
+            'tourism_site__slug': options['site'],
+            'visit_date__gte': options['date_from'],
+            'visit_date__lte': options['date_to'],
+        }
+        bookings = bookings.filter(**{lookup: value for lookup, value in filters.items() if value is not None})
+
+        try:
+            out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else self.stdout
+        except OSError as exc:
+            raise CommandError(exc)
+        rows = 0
+        try:
+            for line in csv_lines(list(BOOKING_COLUMNS), booking_rows(bookings)):
+                out.write(line)
+                rows += 1
+        finally:
+            if out is not self.stdout:
+                out.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'[OK] Exported {rows - 1} bookings to {options["output"]}'))
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.startup import PHASES, profile_startup
+
+PHASE_LABELS = {
+    'django': 'import django',
+    'setup': 'django.setup() (apps ready)',
+    'application': 'import {module}',
+    'urls': 'load the URLconf',
+}
+
+
+class Command(BaseCommand):
+    help = 'Measures worker startup per phase and per imported module, against STARTUP_TIME_BUDGET_MS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='settings.wsgi', help='Entry point a worker imports')
+        parser.add_argument('--runs', type=int, default=3, help='Fresh processes to take the median of')
+        parser.add_argument('--top', type=int, default=15, help='Slowest modules to list')
+        parser.add_argument('--budget', type=float, default=settings.STARTUP_TIME_BUDGET_MS, help='Milliseconds')
+
+    def handle(self, *args, **options):
+        try:
+            profile = profile_startup(options['module'], options['runs'])
+        except RuntimeError as exc:
+            raise CommandError(exc)
+
+        for phase in PHASES:
+            label = PHASE_LABELS[phase].format(module=options['module'])
+            self.stdout.write(f'  {label:<32}{profile.phases[phase]:>9.1f} ms')
+        self.stdout.write(f'  {"total":<32}{profile.total_ms:>9.1f} ms (budget {options["budget"]:.0f} ms)')
+
+        self.stdout.write(f'\n  Slowest modules, own import time (-X importtime, {len(profile.imports)} modules):')
+        for module in profile.slowest(options['top']):
+            self.stdout.write(f'  {module.self_ms:>9.1f} ms  {module.name}')
+        self.stdout.write('\n  By top-level package:')
+        for package, own_ms in profile.by_package(options['top']):
+            self.stdout.write(f'  {own_ms:>9.1f} ms  {package}')
+
+        if profile.total_ms > options['budget']:
+            raise CommandError(f'Startup took {profile.total_ms:.0f} ms, over the {options["budget"]:.0f} ms budget')
+        self.stdout.write(self.style.SUCCESS('[OK] Startup within budget'))
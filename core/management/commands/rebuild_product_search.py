@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from core import search
+from core.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for products'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Full-text search index is only used on SQLite')
+
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'[OK] Indexed {Product.objects.count()} products'))
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from core.replica import REPLICA, refresh
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary database to the read replica with the SQLite backup API'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=float, metavar='SECONDS',
+            help=f'Keep refreshing at this interval (well under REPLICA_MAX_LAG, {settings.REPLICA_MAX_LAG}s)',
+        )
+
+    def handle(self, *args, **options):
+        if REPLICA not in connections or connections[REPLICA].vendor != 'sqlite':
+            raise CommandError('No SQLite "replica" database is configured')
+        interval = options['every']
+        if interval is not None and interval >= settings.REPLICA_MAX_LAG:
+            raise CommandError(f'--every must be shorter than REPLICA_MAX_LAG ({settings.REPLICA_MAX_LAG}s)')
+
+        while True:
+            started = time.perf_counter()
+            try:
+                pages = refresh()
+            except DatabaseError as exc:
+                if interval is None:
+                    raise CommandError(exc)
+                # Pages fall back to the primary until a refresh succeeds
+                self.stderr.write(f'Refresh failed: {exc}')
+            else:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(self.style.SUCCESS(f'[OK] Copied {pages} pages to the replica in {elapsed * 1000:.0f} ms'))
+            if interval is None:
+                return
+            time.sleep(max(interval - (time.perf_counter() - started), 0))
@@ -1,13 +1,24 @@
+from django.core.cache import cache
 from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection
 from django.utils import timezone
 from datetime import date, time, timedelta
 from decimal import Decimal
+from core.management import synthetic
 from core.models import (
-    Chief, HistoricalEvent, TourismSite, Booking,
+    Chief, HistoricalEvent, TourismSite, Booking, CapacityLedger,
     ProductCategory, Product, ProjectCategory, Project,
     Bid, Newsletter, ContactMessage
 )
 import random
+import time as clock
+
+# Children before parents, for backends that check foreign keys per statement
+CLEAR_ORDER = [
+    ContactMessage, Newsletter, Bid, Project, ProjectCategory, Product, ProductCategory,
+    CapacityLedger, Booking, TourismSite, HistoricalEvent, Chief,
+]
 
 
 class Command(BaseCommand):
@@ -19,21 +30,26 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing data before seeding',
         )
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=0,
+            help='Add synthetic rows on top of the seed data: per unit of scale '
+                 '500 events, 10k products, 10k bookings and 250k bids',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed, so repeated runs produce the same data',
+        )
 
     def handle(self, *args, **options):
+        random.seed(options['seed'])
+
         if options['clear']:
             self.stdout.write('Clearing existing data...')
-            ContactMessage.objects.all().delete()
-            Newsletter.objects.all().delete()
-            Bid.objects.all().delete()
-            Project.objects.all().delete()
-            ProjectCategory.objects.all().delete()
-            Product.objects.all().delete()
-            ProductCategory.objects.all().delete()
-            Booking.objects.all().delete()
-            TourismSite.objects.all().delete()
-            HistoricalEvent.objects.all().delete()
-            Chief.objects.all().delete()
+            self.clear()
             self.stdout.write(self.style.SUCCESS('[OK] Existing data cleared'))
 
         self.stdout.write('Seeding database...\n')
@@ -426,7 +442,7 @@ class Command(BaseCommand):
                 bid_count += 1
             
             product.current_bid = current_bid
-            product.save()
+            product.save(update_fields=['current_bid'])
 
         self.stdout.write(f'  [+] Created {bid_count} bids')
 
@@ -583,6 +599,9 @@ class Command(BaseCommand):
             )
         self.stdout.write('  [+] Created 15 contact messages')
 
+        if options['scale']:
+            self.seed_scaled(options['scale'], options['seed'], chiefs, tourism_sites, product_categories)
+
         self.stdout.write(self.style.SUCCESS('\n[+] Database seeding completed successfully!'))
         self.stdout.write(self.style.SUCCESS('\nSummary:'))
         self.stdout.write(f'  - Chiefs: {Chief.objects.count()}')
@@ -596,3 +615,37 @@ class Command(BaseCommand):
         self.stdout.write(f'  - Projects: {Project.objects.count()}')
         self.stdout.write(f'  - Newsletter Subscribers: {Newsletter.objects.count()}')
         self.stdout.write(f'  - Contact Messages: {ContactMessage.objects.count()}')
+
+    def clear(self):
+        # Flush the tables the way ``manage.py flush`` does: QuerySet.delete()
+        # would load every row to collect cascades and send post_delete
+        # signals one object at a time. Resetting the sequences keeps the
+        # ids, and so the synthetic slugs, identical from run to run.
+        tables = [model._meta.db_table for model in CLEAR_ORDER]
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(no_style(), tables, reset_sequences=True)
+        )
+        # Signals were bypassed, so no cached page knows the rows are gone
+        cache.clear()
+
+    def seed_scaled(self, scale, seed, chiefs, tourism_sites, product_categories):
+        rng = random.Random(seed)
+        counts = {name: per_unit * scale for name, per_unit in synthetic.SCALE_UNIT.items()}
+        self.stdout.write(f'\nCreating synthetic data (scale {scale})...')
+
+        steps = [
+            ('events', lambda: synthetic.bulk_events(chiefs, counts['events'], rng)),
+            ('products + bids', lambda: synthetic.bulk_products(
+                product_categories, counts['products'], counts['bids'], rng
+            )),
+            ('bookings', lambda: synthetic.bulk_bookings(tourism_sites, counts['bookings'], rng)),
+        ]
+        for label, step in steps:
+            rows = sum(counts[name] for name in label.split(' + '))
+            started = clock.perf_counter()
+            step()
+            seconds = clock.perf_counter() - started
+            self.stdout.write(f'  [+] {rows:,} {label} in {seconds:.1f}s ({rows / seconds:,.0f} rows/s)')
+
+        # bulk_create skips the signals that keep the cached pages current
+        cache.clear()
@@ -0,0 +1,228 @@
+"""Synthetic data shared by the benchmark commands and ``seed_data --scale``."""
+import random
+import time
+from datetime import date, time as clock, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.text import slugify
+from core.models import Bid, Booking, CapacityLedger, HistoricalEvent, Product, ProductCategory
+from core.references import assign_booking_references
+
+WORDS = [
+    'spear', 'shield', 'necklace', 'bracelet', 'carving', 'pottery', 'basket', 'drum',
+    'mask', 'cloth', 'beaded', 'royal', 'warrior', 'ebony', 'mahogany', 'clay', 'brass',
+    'kalenga', 'iringa', 'hehe', 'lugalo', 'sunset', 'portrait', 'ceremonial', 'ancient',
+]
+ARTISTS = ['Saidi Mlawa', 'Neema Kimayu', 'John Mtengule', 'Grace Mwakalinga', 'Daniel Sapi', 'Maria Ngowi']
+
+
+def create_bench_products(slug, count, seed=42, batch_size=5000):
+    """Bulk-create ``count`` products in their own category; returns (category, seconds)"""
+    category, _ = ProductCategory.objects.get_or_create(slug=slug, defaults={'name': slug.replace('-', ' ').title()})
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    batch = []
+    with transaction.atomic():
+        for i in range(count):
+            words = rng.sample(WORDS, 3)
+            batch.append(Product(
+                name=' '.join(words).title(),
+                slug=f'{slug}-{i}',
+                category=category,
+                description=' '.join(rng.choices(WORDS, k=30)),
+                product_type='physical',
+                price=Decimal(rng.randint(1000, 500000)),
+                artist_name=rng.choice(ARTISTS),
+            ))
+            if len(batch) == batch_size:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+    return category, time.perf_counter() - started
+
+
+def drop_bench_products(category):
+    with transaction.atomic():
+        Product.objects.filter(category=category).delete()
+        category.delete()
+
+
+# Rows generated per unit of ``seed_data --scale``
+SCALE_UNIT = {
+    'events': 500,
+    'products': 10_000,
+    'bookings': 10_000,
+    'bids': 250_000,
+}
+EVENT_KINDS = ['Council at', 'Raid near', 'Harvest festival in', 'Treaty signed at', 'Fortification of', 'Trade caravan to']
+PLACES = ['Kalenga', 'Lugalo', 'Iringa', 'Mlambalasi', 'Isimani', 'Pawaga', 'Mufindi', 'Kilolo']
+VISITORS = ['Amina Said', 'Peter Mallya', 'Halima Juma', 'Joseph Nyerere', 'Rehema Mushi', 'Tom Becker']
+
+
+def next_id(model):
+    """First primary key after the rows already in ``model``'s table"""
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def chunked(count, size):
+    """Yield ``range`` objects covering ``range(count)`` in ``size`` steps"""
+    for start in range(0, count, size):
+        yield range(start, min(start + size, count))
+
+
+def insert_rows(model, fields, rows):
+    """INSERT already database-ready ``rows`` of ``fields`` with executemany.
+
+    For the millions-of-rows tables: bulk_create spends most of its time
+    preparing each field of each instance in Python.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})', rows
+        )
+
+
+def bulk_events(chiefs, count, rng, batch_size=5000):
+    """Create ``count`` historical events spread over the chiefs' reigns"""
+    first = next_id(HistoricalEvent)
+    for chunk in chunked(count, batch_size):
+        batch = []
+        for i in chunk:
+            chief = chiefs[i % len(chiefs)]
+            year = rng.randint(chief.reign_start or 1850, chief.reign_end or 1990)
+            title = f'{rng.choice(EVENT_KINDS)} {rng.choice(PLACES)}'
+            batch.append(HistoricalEvent(
+                pk=first + i,
+                title=title,
+                slug=f'{slugify(title)}-{first + i}',
+                date=date(year, rng.randint(1, 12), rng.randint(1, 28)),
+                description=' '.join(rng.choices(WORDS, k=40)),
+                chief=chief,
+            ))
+        with transaction.atomic():
+            HistoricalEvent.objects.bulk_create(batch)
+
+
+def bulk_products(categories, count, bids, rng, batch_size=2000):
+    """Create ``count`` products carrying ``bids`` bids between them.
+
+    Bids are generated together with their product so ``current_bid`` and
+    ``bid_count`` come out exactly as ``Bid.save()`` would have left them.
+    """
+    bid_fields = [
+        'id', 'product', 'bidder_name', 'bidder_email', 'bidder_phone', 'bid_amount', 'is_winning', 'created_at',
+    ]
+    first_product = next_id(Product)
+    first_bid = next_id(Bid)
+    per_product, extra = divmod(bids, count) if count else (0, 0)
+    bid_no = 0
+    for chunk in chunked(count, batch_size):
+        products, product_bids = [], []
+        created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        for i in chunk:
+            pk = first_product + i
+            name = ' '.join(rng.sample(WORDS, 3)).title()
+            price = Decimal(rng.randint(1000, 500000))
+            product = Product(
+                pk=pk,
+                name=name,
+                slug=f'{slugify(name)}-{pk}',
+                category=categories[i % len(categories)],
+                description=' '.join(rng.choices(WORDS, k=30)),
+                product_type=rng.choice(['nft', 'physical', 'both']),
+                price=price,
+                artist_name=rng.choice(ARTISTS),
+                year_created=rng.randint(1990, 2025),
+            )
+            amount = price
+            num_bids = per_product + (i < extra)
+            for n in range(num_bids):
+                amount += rng.randint(500, 20000)
+                product_bids.append((
+                    first_bid + bid_no,
+                    pk,
+                    rng.choice(VISITORS),
+                    f'bidder{first_bid + bid_no}@example.com',
+                    f'+25571{rng.randint(1000000, 9999999)}',
+                    str(amount),
+                    n == num_bids - 1,
+                    created_at,
+                ))
+                bid_no += 1
+            if num_bids:
+                product.status = 'bidding'
+                product.starting_bid = price
+                product.current_bid = amount
+                product.bid_count = num_bids
+            else:
+                product.status = rng.choice(['available', 'available', 'sold', 'reserved'])
+            products.append(product)
+        with transaction.atomic():
+            Product.objects.bulk_create(products)
+            insert_rows(Bid, bid_fields, product_bids)
+
+
+def bulk_bookings(sites, count, rng, batch_size=5000):
+    """Create ``count`` bookings over the coming months and book their places.
+
+    Bookings that would overfill a site's day are stored as cancelled, the
+    same outcome the booking form gives; the ledger rows are written in one
+    upsert at the end.
+    """
+    first = next_id(Booking)
+    capacity = sum(site.capacity for site in sites)
+    # Roughly half the capacity of each day ends up booked
+    horizon = max(30, count * 5 // max(capacity // 2, 1))
+    today = date.today()
+    booked = {
+        (row.tourism_site_id, row.visit_date): row.booked_visitors
+        for row in CapacityLedger.objects.filter(tourism_site__in=sites, visit_date__gt=today)
+    }
+    for chunk in chunked(count, batch_size):
+        batch = []
+        for i in chunk:
+            site = rng.choice(sites)
+            visit_date = today + timedelta(days=rng.randint(1, horizon))
+            visitors = rng.randint(1, 8)
+            visitor_type = rng.choice(['local', 'foreign'])
+            key = (site.pk, visit_date)
+            status = rng.choice(['pending', 'confirmed', 'confirmed', 'completed'])
+            if booked.get(key, 0) + visitors > site.capacity:
+                status = 'cancelled'
+            else:
+                booked[key] = booked.get(key, 0) + visitors
+            fee = site.entry_fee_local if visitor_type == 'local' else site.entry_fee_foreign
+            batch.append(Booking(
+                pk=first + i,
+                tourism_site=site,
+                visitor_name=rng.choice(VISITORS),
+                visitor_email=f'visitor{first + i}@example.com',
+                visitor_phone=f'+25571{rng.randint(1000000, 9999999)}',
+                visitor_type=visitor_type,
+                number_of_visitors=visitors,
+                visit_date=visit_date,
+                visit_time=clock(rng.randint(8, 15), rng.choice([0, 30])),
+                total_amount=fee * visitors,
+                status=status,
+            ))
+        assign_booking_references(batch)
+        with transaction.atomic():
+            Booking.objects.bulk_create(batch)
+
+    with transaction.atomic():
+        CapacityLedger.objects.bulk_create(
+            [
+                CapacityLedger(tourism_site_id=site_id, visit_date=visit_date, booked_visitors=visitors)
+                for (site_id, visit_date), visitors in booked.items()
+            ],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['tourism_site', 'visit_date'],
+            update_fields=['booked_visitors'],
+        )
@@ -0,0 +1,184 @@
+"""Per-request performance metrics.
+
+``core.middleware.PerformanceMiddleware`` times the SQL (an execute wrapper
+on each connection), the template rendering (``TimedDjangoTemplates``) and
+the total of every request, through a context variable that also reaches
+the threads running async views' queries. The numbers go into per-URL-name
+histograms, readable by staff or ``METRICS_TOKEN`` at ``/metrics/`` along
+with the fragment cache hit ratios, and into a ``Server-Timing`` header
+when SERVER_TIMING is on.
+
+Histograms are kept in process memory, so every worker reports its own.
+"""
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+# Upper bounds of the histogram buckets; the last bucket is unbounded
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """What one request spent on SQL and templates, in milliseconds"""
+    __slots__ = ('queries', 'sql_ms', 'template_ms', 'rendering')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.rendering = False
+
+    def server_timing(self, total_ms):
+        # Template time includes the queries run lazily while rendering
+        return (
+            f'db;dur={self.sql_ms:.1f};desc="{self.queries} queries", '
+            f'tpl;dur={self.template_ms:.1f}, '
+            f'total;dur={total_ms:.1f}'
+        )
+
+
+def start_request():
+    """Begin collecting timings for the current request or task"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql_ms += (time.perf_counter() - started) * 1000
+        timings.queries += 1
+
+
+def install_query_timer(connection):
+    """Add ``time_query`` to the connection's execute wrappers, once"""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        # Cumulative buckets, as in the Prometheus exposition format
+        buckets, seen = {}, 0
+        for bound, count in zip([*self.bounds, '+Inf'], self.counts):
+            seen += count
+            buckets[str(bound)] = seen
+        return {'count': self.count, 'sum': round(self.sum, 3), 'buckets': buckets}
+
+
+class Registry:
+    """Histograms of total, SQL and template time and query count per view,
+    and hit/miss counts per cached fragment"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.fragments = {}
+
+    def record(self, view_name, timings, total_ms):
+        with self.lock:
+            histograms = self.views.get(view_name)
+            if histograms is None:
+                histograms = self.views[view_name] = {
+                    'total_ms': Histogram(DURATION_BUCKETS),
+                    'sql_ms': Histogram(DURATION_BUCKETS),
+                    'template_ms': Histogram(DURATION_BUCKETS),
+                    'queries': Histogram(QUERY_BUCKETS),
+                }
+            histograms['total_ms'].observe(total_ms)
+            histograms['sql_ms'].observe(timings.sql_ms)
+            histograms['template_ms'].observe(timings.template_ms)
+            histograms['queries'].observe(timings.queries)
+
+    def count_fragments(self, name, hits, misses):
+        with self.lock:
+            counts = self.fragments.setdefault(name, [0, 0])
+            counts[0] += hits
+            counts[1] += misses
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view_name: {name: histogram.as_dict() for name, histogram in histograms.items()}
+                for view_name, histograms in sorted(self.views.items())
+            }
+
+    def fragment_snapshot(self):
+        with self.lock:
+            return {
+                name: {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / ((hits + misses) or 1), 4)}
+                for name, (hits, misses) in sorted(self.fragments.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+            self.fragments.clear()
+
+
+registry = Registry()
+
+
+def can_read_metrics(request):
+    """Staff users, or a request carrying ``Authorization: Bearer <METRICS_TOKEN>``"""
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        # Only the outermost render counts; {% include %} and nested
+        # render_to_string calls are part of it.
+        if timings is None or timings.rendering:
+            return super().render(context, request)
+        timings.rendering = True
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_ms += (time.perf_counter() - started) * 1000
+            timings.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render time added to the request timings"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,69 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from .metrics import finish_request, registry, start_request
+from .replica import PIN_COOKIE
+
+
+class PerformanceMiddleware:
+    """Time each request and report it in Server-Timing and the metrics registry.
+
+    Install it first in MIDDLEWARE so the total includes the queries made
+    by the session and authentication middleware. It runs natively in both
+    the WSGI and the ASGI handler.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.report(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.report(request, response, timings, started)
+
+    def report(self, request, response, timings, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        registry.record(match.view_name if match else '<unresolved>', timings, total_ms)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing(total_ms)
+        return response
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """Read from the primary for REPLICA_MAX_LAG seconds after submitting a form.
+
+    The cookie outlives the replica's lag, so the page a POST redirects to
+    (a booking confirmation, a product with the new bid) and any page after
+    it is read from a copy that already has the visitor's write.
+    """
+
+    def process_response(self, request, response):
+        if settings.READ_REPLICA and request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_MAX_LAG, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Maintained by Bid.save()'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='products/'),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='projects/'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE core_product_fts USING fts5(
+        name, description, artist_name,
+        content='core_product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER core_product_fts_ai AFTER INSERT ON core_product BEGIN
+        INSERT INTO core_product_fts(rowid, name, description, artist_name)
+        VALUES (new.id, new.name, new.description, new.artist_name);
+    END
+    """,
+    """
+    CREATE TRIGGER core_product_fts_ad AFTER DELETE ON core_product BEGIN
+        INSERT INTO core_product_fts(core_product_fts, rowid, name, description, artist_name)
+        VALUES ('delete', old.id, old.name, old.description, old.artist_name);
+    END
+    """,
+    """
+    CREATE TRIGGER core_product_fts_au AFTER UPDATE OF name, description, artist_name ON core_product BEGIN
+        INSERT INTO core_product_fts(core_product_fts, rowid, name, description, artist_name)
+        VALUES ('delete', old.id, old.name, old.description, old.artist_name);
+        INSERT INTO core_product_fts(rowid, name, description, artist_name)
+        VALUES (new.id, new.name, new.description, new.artist_name);
+    END
+    """,
+    "INSERT INTO core_product_fts(core_product_fts) VALUES ('rebuild')",
+]
+
+REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS core_product_fts_au',
+    'DROP TRIGGER IF EXISTS core_product_fts_ad',
+    'DROP TRIGGER IF EXISTS core_product_fts_ai',
+    'DROP TABLE IF EXISTS core_product_fts',
+]
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_product_bid_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(FORWARD_SQL), run_sqlite(REVERSE_SQL)),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_ledger(apps, schema_editor):
+    Booking = apps.get_model('core', 'Booking')
+    CapacityLedger = apps.get_model('core', 'CapacityLedger')
+    totals = (
+        Booking.objects.exclude(status='cancelled')
+        .values('tourism_site_id', 'visit_date')
+        .annotate(visitors=Sum('number_of_visitors'))
+        .order_by()
+    )
+    CapacityLedger.objects.bulk_create(
+        CapacityLedger(
+            tourism_site_id=row['tourism_site_id'],
+            visit_date=row['visit_date'],
+            booked_visitors=row['visitors'],
+        )
+        for row in totals
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_product_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CapacityLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('visit_date', models.DateField()),
+                ('booked_visitors', models.PositiveIntegerField(default=0)),
+                ('tourism_site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='capacity_ledger', to='core.tourismsite')),
+            ],
+            options={
+                'ordering': ['visit_date'],
+                'constraints': [models.UniqueConstraint(fields=('tourism_site', 'visit_date'), name='unique_site_visit_date')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
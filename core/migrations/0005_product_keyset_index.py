@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_capacity_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', 'id'], name='product_created_id_idx'),
+        ),
+    ]
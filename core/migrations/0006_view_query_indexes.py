@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_product_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('is_winning', True)), fields=['product', '-bid_amount', '-created_at'], name='bid_product_winning_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalevent',
+            index=models.Index(fields=['chief', '-date'], name='event_chief_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('featured', True)), fields=['status', '-created_at'], name='product_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('featured', True)), fields=['status', '-start_date'], name='project_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tourismsite',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['site_type'], name='site_active_type_idx'),
+        ),
+    ]
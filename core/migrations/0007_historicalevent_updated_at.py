@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_view_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalevent',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
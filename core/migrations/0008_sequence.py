@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:11
+
+from django.db import migrations, models
+
+
+def create_booking_sequence(apps, schema_editor):
+    Sequence = apps.get_model('core', 'Sequence')
+    Sequence.objects.using(schema_editor.connection.alias).create(name='booking_reference')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_historicalevent_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(create_booking_sequence, migrations.RunPython.noop),
+    ]
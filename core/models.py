@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Max, OuterRef, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 
+from .references import next_booking_reference
+
 
 class Chief(models.Model):
     """Model for Chief Mkwawa lineage from 1st to 5th"""
@@ -49,9 +53,13 @@ class HistoricalEvent(models.Model):
     image = models.ImageField(upload_to='historical/', null=True, blank=True)
     slug = models.SlugField(unique=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['chief', '-date'], name='event_chief_date_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -88,6 +96,11 @@ class TourismSite(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['site_type'], condition=models.Q(is_active=True), name='site_active_type_idx'),
+        ]
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
@@ -97,6 +110,74 @@ class TourismSite(models.Model):
         return f"{self.name} - {self.get_site_type_display()}"
 
 
+class CapacityExceeded(Exception):
+    """Raised when a booking would take a site over its daily capacity"""
+
+    def __init__(self, remaining):
+        self.remaining = remaining
+        super().__init__(f'Only {remaining} place(s) left on this date')
+
+
+class CapacityLedgerManager(models.Manager):
+    def reserve(self, site_id, visit_date, visitors):
+        """Claim ``visitors`` places or raise CapacityExceeded.
+
+        Must run inside the transaction that writes the booking.
+        """
+        self.bulk_create(
+            [self.model(tourism_site_id=site_id, visit_date=visit_date)],
+            ignore_conflicts=True,
+        )
+        reserved = self.filter(
+            tourism_site_id=site_id,
+            visit_date=visit_date,
+            booked_visitors__lte=F('tourism_site__capacity') - visitors,
+        ).update(booked_visitors=F('booked_visitors') + visitors)
+        if not reserved:
+            raise CapacityExceeded(self.remaining(site_id, visit_date))
+
+    def release(self, site_id, visit_date, visitors):
+        # Clamped: ledger rows written before a booking's places were
+        # counted must not go negative when it is cancelled
+        self.filter(tourism_site_id=site_id, visit_date=visit_date).update(
+            booked_visitors=Greatest(F('booked_visitors') - visitors, 0)
+        )
+
+    def remaining(self, site_id, visit_date):
+        capacity = TourismSite.objects.filter(pk=site_id).values_list('capacity', flat=True).get()
+        booked = self.filter(tourism_site_id=site_id, visit_date=visit_date).values_list(
+            'booked_visitors', flat=True
+        ).first() or 0
+        return max(capacity - booked, 0)
+
+
+class CapacityLedger(models.Model):
+    """Visitors booked per site and day, kept in step with Booking rows"""
+    tourism_site = models.ForeignKey(TourismSite, on_delete=models.CASCADE, related_name='capacity_ledger')
+    visit_date = models.DateField()
+    booked_visitors = models.PositiveIntegerField(default=0)
+    
+    objects = CapacityLedgerManager()
+    
+    class Meta:
+        ordering = ['visit_date']
+        constraints = [
+            models.UniqueConstraint(fields=['tourism_site', 'visit_date'], name='unique_site_visit_date'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tourism_site.name} on {self.visit_date}: {self.booked_visitors}"
+
+
+class Sequence(models.Model):
+    """Named counter handed out in blocks (core/references.py)"""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
 class Booking(models.Model):
     """Booking system for tourism sites"""
     STATUS_CHOICES = [
@@ -126,9 +207,22 @@ class Booking(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.booking_reference:
-            import uuid
-            self.booking_reference = f"MKW{uuid.uuid4().hex[:8].upper()}"
-        super().save(*args, **kwargs)
+            self.booking_reference = next_booking_reference()
+        # Move this booking's places in the capacity ledger together with
+        # the row itself: new and re-activated bookings claim places,
+        # cancellations give them back.
+        with transaction.atomic():
+            if self.pk:
+                previous = Booking.objects.filter(pk=self.pk).values(
+                    'tourism_site_id', 'visit_date', 'number_of_visitors', 'status'
+                ).first()
+                if previous and previous['status'] != 'cancelled':
+                    CapacityLedger.objects.release(
+                        previous['tourism_site_id'], previous['visit_date'], previous['number_of_visitors']
+                    )
+            if self.status != 'cancelled':
+                CapacityLedger.objects.reserve(self.tourism_site_id, self.visit_date, self.number_of_visitors)
+            super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.booking_reference} - {self.visitor_name}"
@@ -175,6 +269,7 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     starting_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     current_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    bid_count = models.PositiveIntegerField(default=0, editable=False, help_text='Maintained by Bid.save()')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     artist_name = models.CharField(max_length=200)
     dimensions = models.CharField(max_length=100, blank=True)
@@ -191,6 +286,14 @@ class Product(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the catalog (core.pagination)
+            models.Index(fields=['-created_at', 'id'], name='product_created_id_idx'),
+            # Home page showcase: featured products by status, newest first.
+            # Boolean filters compile to a bare ``WHERE featured``, which SQLite
+            # can only serve from a partial index with the same condition.
+            models.Index(fields=['status', '-created_at'], condition=models.Q(featured=True), name='product_featured_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -213,11 +316,33 @@ class Bid(models.Model):
     
     class Meta:
         ordering = ['-bid_amount', '-created_at']
+        indexes = [
+            models.Index(fields=['product', '-bid_amount', '-created_at'], condition=models.Q(is_winning=True), name='bid_product_winning_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        # Keep the product's bid counters in step with the bid rows so the
+        # listings never have to count bids per card.
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            amount = Value(self.bid_amount, output_field=self._meta.get_field('bid_amount'))
+            Product.objects.filter(pk=self.product_id).update(
+                bid_count=F('bid_count') + 1,
+                current_bid=Greatest(Coalesce('current_bid', amount), amount),
+            )
     
     def __str__(self):
         return f"{self.bidder_name} - ${self.bid_amount} on {self.product.name}"
 
 
+def bid_totals():
+    """Subqueries of the number of bids and the highest bid on the outer Product"""
+    bids = Bid.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    return bids.annotate(total=Count('pk')).values('total'), bids.annotate(highest=Max('bid_amount')).values('highest')
+
+
 class ProjectCategory(models.Model):
     """Categories for projects"""
     name = models.CharField(max_length=100)
@@ -271,6 +396,9 @@ class Project(models.Model):
     
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['status', '-start_date'], condition=models.Q(featured=True), name='project_featured_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
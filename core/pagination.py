@@ -0,0 +1,110 @@
+"""Keyset (cursor) pagination for the products catalog.
+
+Pages are addressed by the ``(created_at, id)`` of the row they continue
+from instead of an OFFSET, so every page costs the same index seek however
+deep it is, and rows inserted meanwhile never shift a page. The cursor is
+an opaque URL-safe token.
+"""
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+ORDERING = ('-created_at', 'id')
+REVERSED = ('created_at', '-id')
+ESTIMATE_TIMEOUT = 300
+ESTIMATE_CAP = 1000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj, direction):
+    raw = json.dumps({'c': obj.created_at.isoformat(), 'i': obj.pk, 'd': direction})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        created_at = parse_datetime(data['c'])
+        pk = int(data['i'])
+        direction = data['d']
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(token)
+    if created_at is None or direction not in ('next', 'prev'):
+        raise InvalidCursor(token)
+    return created_at, pk, direction
+
+
+class CursorPage:
+    """One page of results; iterable like a Paginator page"""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1], 'next') if self.has_next_page else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0], 'prev') if self.has_previous_page else None
+
+
+def paginate_by_cursor(queryset, token, per_page):
+    """The CursorPage of the unsliced ``queryset`` that ``token`` points at, in (-created_at, id) order"""
+    if not token:
+        rows = list(queryset.order_by(*ORDERING)[:per_page + 1])
+        return CursorPage(rows[:per_page], len(rows) > per_page, False)
+
+    # The redundant created_at bound lets SQLite start the index range at the
+    # cursor; the OR alone makes it walk the index from the beginning.
+    created_at, pk, direction = decode_cursor(token)
+    if direction == 'next':
+        after = Q(created_at__lt=created_at) | Q(created_at=created_at, id__gt=pk)
+        rows = list(queryset.filter(after, created_at__lte=created_at).order_by(*ORDERING)[:per_page + 1])
+        return CursorPage(rows[:per_page], len(rows) > per_page, True)
+
+    before = Q(created_at__gt=created_at) | Q(created_at=created_at, id__lt=pk)
+    rows = list(queryset.filter(before, created_at__gte=created_at).order_by(*REVERSED)[:per_page + 1])
+    page = rows[:per_page]
+    page.reverse()
+    return CursorPage(page, True, len(rows) > per_page)
+
+
+def estimated_count(queryset):
+    """Row count for ``queryset``, recomputed at most every few minutes.
+
+    Counting stops past ESTIMATE_CAP rows, so a broad filter costs a bounded
+    walk instead of a full COUNT; anything above the cap is ESTIMATE_CAP + 1.
+    """
+    sql, params = queryset.query.sql_with_params()
+    key = 'count_estimate:' + hashlib.sha256(f'{sql}{params}'.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.order_by()[:ESTIMATE_CAP + 1].count()
+        cache.set(key, count, ESTIMATE_TIMEOUT)
+    return count
@@ -0,0 +1,151 @@
+"""Compact, collision-free booking references.
+
+References are ``MKW`` + a sequence number in 8 Crockford Base32 digits +
+a check symbol: 12 characters such as ``MKW00000034N`` that are easy to
+read out over the phone and one longer than the earlier uuid-based ones, so
+the two never clash. The check symbol (Luhn mod 32) catches
+any single mistyped character and most swapped neighbours.
+
+References are sequential, so knowing one is no proof of owning the
+booking: the confirmation page only shows the visitor's contact details to
+the session the booking was made from (``core.views``).
+
+Sequence numbers come from a ``Sequence`` row, reserved BLOCK_SIZE at a time
+with one UPDATE, so a process pays a database round trip per block rather
+than per booking, and no two processes ever hold the same number. A block
+reserved inside a transaction is only kept for later callers once that
+transaction commits: if it rolls back, the reservation is undone in the
+database and must not be handed out again.
+"""
+import os
+import re
+import threading
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+VALUES = {symbol: value for value, symbol in enumerate(ALPHABET)}
+# Read as the digit they look like, as Crockford's encoding specifies
+LOOKALIKES = str.maketrans('OIL', '011')
+PREFIX = 'MKW'
+DIGITS = 8  # 32 ** 8, about 10 ** 12 references
+BLOCK_SIZE = 100
+# uuid-based references issued before the sequence
+LEGACY_RE = re.compile(r'MKW[0-9A-F]{8}')
+
+
+def encode(value):
+    digits = []
+    while value:
+        value, remainder = divmod(value, 32)
+        digits.append(ALPHABET[remainder])
+    return ''.join(reversed(digits)).rjust(DIGITS, '0')
+
+
+def check_symbol(code):
+    """Luhn mod 32 over the Base32 digits of ``code``"""
+    total, factor = 0, 2
+    for symbol in reversed(code):
+        addend = factor * VALUES[symbol]
+        total += addend // 32 + addend % 32
+        factor = 3 - factor
+    return ALPHABET[-total % 32]
+
+
+def format_reference(value):
+    code = encode(value)
+    return f'{PREFIX}{code}{check_symbol(code)}'
+
+
+def normalize(reference):
+    """Undo what people do when typing a reference: case, spaces, hyphens, O for 0"""
+    reference = reference.upper().replace('-', '').replace(' ', '')
+    if not reference.startswith(PREFIX):
+        return reference
+    return PREFIX + reference[len(PREFIX):].translate(LOOKALIKES)
+
+
+def is_valid(reference):
+    """Whether ``reference``, as typed, can name a booking: a legacy reference
+    or one whose check symbol matches"""
+    reference = normalize(reference)
+    if LEGACY_RE.fullmatch(reference):
+        return True
+    code, check = reference[len(PREFIX):-1], reference[-1:]
+    return (
+        reference.startswith(PREFIX) and len(code) == DIGITS
+        and all(symbol in VALUES for symbol in code) and check_symbol(code) == check
+    )
+
+
+def reserve(name, size, floor=1):
+    """Reserve ``size`` numbers of the ``name`` sequence, none below ``floor``.
+
+    Returns ``range(start, end)``. The floor keeps a process from reusing
+    numbers it already holds if the row was reset under it (a flushed or
+    rolled-back test database).
+    """
+    from .models import Sequence
+
+    with transaction.atomic():
+        sequences = Sequence.objects.filter(name=name)
+        advance = {'next_value': Greatest(F('next_value'), floor) + size}
+        if not sequences.update(**advance):
+            # Only after a flush: the migration creates the row
+            Sequence.objects.get_or_create(name=name)
+            sequences.update(**advance)
+        end = sequences.values_list('next_value', flat=True).get()
+    return range(end - size, end)
+
+
+class BlockSequence:
+    """Numbers of a ``Sequence`` row handed out from blocks reserved in advance"""
+
+    def __init__(self, name, block_size=BLOCK_SIZE):
+        self.name = name
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        self.block = iter(())
+        self.high = 0  # highest number this process has reserved
+        self.pid = os.getpid()
+
+    def take(self, count=1):
+        """``count`` unused numbers, ascending within each block"""
+        with self.lock:
+            if self.pid != os.getpid():
+                # A forked worker must not reuse the block its parent holds
+                self.block, self.pid = iter(()), os.getpid()
+            taken = list(islice(self.block, count))
+        if len(taken) < count:
+            missing = count - len(taken)
+            numbers = reserve(self.name, max(missing, self.block_size), floor=self.high + 1)
+            taken.extend(numbers[:missing])
+            self.high = max(self.high, numbers[-1])
+            if connection.in_atomic_block:
+                transaction.on_commit(lambda: self.keep(numbers[missing:]))
+            else:
+                self.keep(numbers[missing:])
+        return taken
+
+    def keep(self, numbers):
+        with self.lock:
+            if self.pid == os.getpid():
+                self.block = iter(numbers)
+
+
+booking_numbers = BlockSequence('booking_reference')
+
+
+def next_booking_reference():
+    return format_reference(booking_numbers.take()[0])
+
+
+def assign_booking_references(bookings):
+    """Fill in the blank references of ``bookings`` before a bulk_create"""
+    blank = [booking for booking in bookings if not booking.booking_reference]
+    for booking, number in zip(blank, booking_numbers.take(len(blank))):
+        booking.booking_reference = format_reference(number)
+    return bookings
@@ -0,0 +1,199 @@
+"""Public pages read from a local SQLite replica; everything else uses the primary.
+
+The ``replica`` database is a copy of ``default`` taken with SQLite's online
+backup API by ``manage.py refresh_replica --every N``. Views wrapped in
+``@replica_reads`` (the home, catalog and heritage pages, the booking
+confirmation) send their queries there, which keeps their reads off the
+primary the booking, bid and contact forms write to. ``ReplicaRouter``
+sends every write, and every read after a write in the same request, to the
+primary.
+
+Replica reads are bounded to ``REPLICA_MAX_LAG`` seconds of staleness:
+
+* ``refresh()`` records in the cache when the snapshot it copied was
+  taken, and a view only reads the replica while that snapshot is younger
+  than the lag; a stalled refresher sends everyone back to the primary.
+* Visitors who have just submitted a form carry a cookie for the same
+  lag (``core.middleware.ReplicaPinMiddleware``), so the page they are
+  redirected to, such as the booking confirmation, shows what they wrote.
+* Cache entries dropped when a write commits are dropped once more after
+  the lag (``delete_after_lag``), so a page rebuilt from a snapshot taken
+  before the write cannot keep the old rows cached.
+* A row looked up by a unique key that the replica does not have yet is
+  looked up again on the primary before answering 404 (``get_or_404``).
+"""
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import Http404
+
+REPLICA = 'replica'
+REFRESHED_KEY = 'replica_refreshed_at'
+PIN_COOKIE = 'primary_reads'
+
+
+class ReadState:
+    __slots__ = ('replica',)
+
+    def __init__(self, replica):
+        self.replica = replica
+
+
+_reads = ContextVar('replica_reads', default=None)
+
+
+def is_fresh():
+    """Whether the last snapshot copied to the replica is within the lag"""
+    if not settings.READ_REPLICA:
+        return False
+    taken = cache.get(REFRESHED_KEY)
+    return taken is not None and time.time() - taken < settings.REPLICA_MAX_LAG
+
+
+def use_replica(request):
+    return (
+        request.method in ('GET', 'HEAD') and PIN_COOKIE not in request.COOKIES and is_fresh()
+    )
+
+
+def replica_reads(view):
+    """Run ``view``'s queries on the replica when it is fresh enough for this visitor"""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _reads.set(ReadState(use_replica(request)))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _reads.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _reads.set(ReadState(use_replica(request)))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _reads.reset(token)
+    return wrapper
+
+
+def get_or_404(queryset, **lookup):
+    """The one row of ``queryset`` matching ``lookup``, a unique key; a miss
+    on the replica is retried on the primary"""
+    try:
+        return queryset.get(**lookup)
+    except queryset.model.DoesNotExist:
+        if queryset.db == REPLICA:
+            try:
+                return queryset.using(DEFAULT_DB_ALIAS).get(**lookup)
+            except queryset.model.DoesNotExist:
+                pass
+    raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+
+async def aget_or_404(queryset, **lookup):
+    try:
+        return await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist:
+        if queryset.db == REPLICA:
+            try:
+                return await queryset.using(DEFAULT_DB_ALIAS).aget(**lookup)
+            except queryset.model.DoesNotExist:
+                pass
+    raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Only the site's own tables: sessions and users are read on every
+        # request and must see the write that created them
+        state = _reads.get()
+        if state is not None and state.replica and model._meta.app_label == 'core':
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _reads.get()
+        if state is not None:
+            # Whatever this request reads next must include the write
+            state.replica = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA} or None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema along with the data from refresh()
+        return db != REPLICA
+
+
+def refresh(source=DEFAULT_DB_ALIAS, target=REPLICA):
+    """Copy ``source`` over ``target`` in one backup step; returns the pages copied.
+
+    The copy runs in a read transaction on the source, so writers carry on,
+    and in one write transaction on the target: readers of the replica see
+    either the previous snapshot or the new one.
+    """
+    taken = time.time()
+    source, target = connections[source], connections[target]
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
+    pages = target.connection.execute('PRAGMA page_count').fetchone()[0]
+    cache.set(REFRESHED_KEY, taken, None)
+    return pages
+
+
+class LagDeletes:
+    """Cache keys to delete again once the replica has caught up with a write"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.due = {}  # key -> time.monotonic() deadline
+        self.pid = None
+
+    def add(self, keys, delay):
+        deadline = time.monotonic() + delay
+        with self.condition:
+            if self.pid != os.getpid():
+                # First use in this process, or a forked worker: the thread
+                # of the parent does not exist here
+                self.pid = os.getpid()
+                threading.Thread(target=self._run, name='replica-lag-deletes', daemon=True).start()
+            self.due.update(dict.fromkeys(keys, deadline))
+            self.condition.notify()
+
+    def flush(self):
+        """Delete every pending key now"""
+        with self.condition:
+            keys, self.due = list(self.due), {}
+        cache.delete_many(keys)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                keys = [key for key, deadline in self.due.items() if deadline <= now]
+                if not keys:
+                    self.condition.wait(min(self.due.values(), default=now + 60) - now)
+                    continue
+                for key in keys:
+                    del self.due[key]
+            cache.delete_many(keys)
+
+
+lag_deletes = LagDeletes()
+
+
+def delete_after_lag(keys):
+    """Delete ``keys`` again once no fresh replica snapshot can predate now"""
+    if is_fresh():
+        lag_deletes.add(keys, settings.REPLICA_MAX_LAG + 1)
@@ -0,0 +1,64 @@
+"""Full-text product search backed by an SQLite FTS5 index.
+
+``core_product_fts`` is an external-content FTS5 table over the searchable
+``Product`` columns. Triggers created in migration 0003 keep it in step with
+``core_product``; ``manage.py rebuild_product_search`` rebuilds it from
+scratch. Databases other than SQLite fall back to ``icontains`` filters.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'core_product_fts'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match(term):
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted so characters such as ``-``, ``:`` or ``*`` in user
+    input are never interpreted as FTS5 query syntax.
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(term))
+
+
+def search_products(products, term):
+    """Filter ``products`` down to matches for ``term``, best matches first"""
+    if not is_available():
+        return products.filter(
+            Q(name__icontains=term) |
+            Q(description__icontains=term) |
+            Q(artist_name__icontains=term)
+        )
+
+    match = build_match(term)
+    if not match:
+        return products.none()
+
+    # The index is read twice, each time driven by the MATCH: once for the
+    # ids to keep, once materialized with its bm25() ranks (bm25() is only
+    # defined in the query that MATCHes) and looked up per product by rowid.
+    # A join instead would let SQLite drive from core_product's indexes and
+    # re-run the MATCH once per product.
+    matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    rank = RawSQL(
+        f'WITH ranked AS MATERIALIZED ('
+        f'SELECT rowid, bm25({FTS_TABLE}, 10.0, 1.0, 5.0) AS rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        f') SELECT rank FROM ranked WHERE rowid = core_product.id',
+        [match], output_field=FloatField(),
+    )
+    return products.filter(pk__in=matches).annotate(search_rank=rank).order_by('search_rank', '-created_at')
+
+
+def rebuild():
+    """Repopulate the index from ``core_product`` and merge its segments"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
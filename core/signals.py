@@ -0,0 +1,82 @@
+from django.db.backends.signals import connection_created
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete
+
+from .caching import (
+    HOME_SECTIONS, invalidate_availability, invalidate_fragments, invalidate_image_markup, invalidate_timeline,
+    sections_for,
+)
+from .images import build_for_instance
+from .metrics import install_query_timer
+from .sqlite import configure as configure_sqlite
+from .models import Bid, Booking, CapacityLedger, Chief, HistoricalEvent, Product, Project, TourismSite, bid_totals
+
+
+def invalidate_home_sections(sender, **kwargs):
+    invalidate_fragments(*sections_for(sender))
+
+
+for model in {model for models in HOME_SECTIONS.values() for model in models}:
+    post_save.connect(invalidate_home_sections, sender=model, dispatch_uid=f'home_sections_save_{model.__name__}')
+    post_delete.connect(invalidate_home_sections, sender=model, dispatch_uid=f'home_sections_delete_{model.__name__}')
+
+
+def release_booking_places(sender, instance, **kwargs):
+    # post_delete also covers queryset and admin bulk deletes
+    if instance.status != 'cancelled':
+        CapacityLedger.objects.release(instance.tourism_site_id, instance.visit_date, instance.number_of_visitors)
+
+
+post_delete.connect(release_booking_places, sender=Booking, dispatch_uid='release_booking_places')
+
+
+def recount_product_bids(sender, instance, origin=None, **kwargs):
+    # Bid.save() only counts inserts; a deleted bid (admin, queryset) is
+    # recounted from the remaining rows in the delete's transaction. Bids
+    # deleted along with their product need nothing.
+    if isinstance(origin, Product) or getattr(origin, 'model', None) is Product:
+        return
+    bid_count, highest_bid = bid_totals()
+    Product.objects.filter(pk=instance.product_id).update(
+        bid_count=Coalesce(Subquery(bid_count), 0), current_bid=Subquery(highest_bid),
+    )
+
+
+post_delete.connect(recount_product_bids, sender=Bid, dispatch_uid='recount_product_bids')
+
+
+def invalidate_site_availability(sender, instance, **kwargs):
+    site_id = instance.pk if sender is TourismSite else instance.tourism_site_id
+    invalidate_availability(site_id)
+
+
+for model in (Booking, TourismSite):
+    post_save.connect(invalidate_site_availability, sender=model, dispatch_uid=f'availability_save_{model.__name__}')
+    post_delete.connect(invalidate_site_availability, sender=model, dispatch_uid=f'availability_delete_{model.__name__}')
+
+
+def invalidate_heritage_timeline(sender, **kwargs):
+    invalidate_timeline()
+
+
+for model in (Chief, HistoricalEvent):
+    post_save.connect(invalidate_heritage_timeline, sender=model, dispatch_uid=f'timeline_save_{model.__name__}')
+    post_delete.connect(invalidate_heritage_timeline, sender=model, dispatch_uid=f'timeline_delete_{model.__name__}')
+
+
+def build_image_variants(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'image' in update_fields:
+        build_for_instance(instance, on_built=lambda: invalidate_image_markup(sender))
+
+
+for model in (Chief, TourismSite, Product, Project):
+    post_save.connect(build_image_variants, sender=model, dispatch_uid=f'image_variants_{model.__name__}')
+
+
+def setup_connection(sender, connection, **kwargs):
+    configure_sqlite(connection)
+    install_query_timer(connection)
+
+
+connection_created.connect(setup_connection, dispatch_uid='setup_connection')
@@ -0,0 +1,26 @@
+"""Connection profile for SQLite in production.
+
+``configure()`` runs for every new connection (see core/signals.py) and
+applies ``settings.SQLITE_PRAGMAS``. With write-ahead logging, readers no
+longer block the writer and the writer no longer blocks readers;
+``busy_timeout`` makes a second writer wait for the lock instead of failing
+with "database is locked". The ``transaction_mode: IMMEDIATE`` option in
+DATABASES takes the write lock when a transaction begins, so a transaction
+that reads before it writes cannot deadlock on the lock upgrade, where
+SQLite fails at once without waiting.
+"""
+from django.conf import settings
+
+
+def configure(connection):
+    if connection.vendor != 'sqlite':
+        return
+    # Straight on the driver connection, so the pragmas stay out of the
+    # query log and the request timings
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def pragma(connection, name):
+    connection.ensure_connection()
+    return connection.connection.execute(f'PRAGMA {name}').fetchone()[0]
@@ -0,0 +1,98 @@
+"""Where a worker's startup time goes.
+
+``profile_startup(module)`` starts a fresh interpreter that loads the site
+the way a worker does: import Django, ``django.setup()`` (models, admin
+registrations, signal handlers), import ``module`` (settings.wsgi builds the
+handler, its middleware, and warms the templates), then load the URLconf,
+which the first request would otherwise pay for (views and admin URLs).
+Each phase is timed, and a second run under ``python -X importtime``
+attributes the time to individual modules. Modules loaded through
+``importlib.import_module`` (app, models and admin modules) are not listed
+by importtime themselves, only the modules they import, so the phase
+timings are the numbers to budget against.
+"""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import NamedTuple
+
+from django.conf import settings
+
+PHASES = ('django', 'setup', 'application', 'urls')
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+marks = [time.perf_counter()]
+django.setup()
+marks.append(time.perf_counter())
+__import__({module!r})
+marks.append(time.perf_counter())
+from django.urls import get_resolver
+get_resolver().url_patterns
+marks.append(time.perf_counter())
+phases = [(mark - previous) * 1000 for previous, mark in zip([started] + marks, marks)]
+print(json.dumps({{'phases': phases, 'modules': sorted(sys.modules)}}))
+'''
+
+IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+class ModuleImport(NamedTuple):
+    name: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+class StartupProfile(NamedTuple):
+    phases: dict  # phase -> median milliseconds
+    imports: list  # ModuleImport per module, in import order
+    modules: list  # sys.modules once the URLconf is loaded
+
+    @property
+    def total_ms(self):
+        return sum(self.phases.values())
+
+    def slowest(self, count=10):
+        return sorted(self.imports, key=lambda module: module.self_ms, reverse=True)[:count]
+
+    def by_package(self, count=10):
+        packages = {}
+        for module in self.imports:
+            package = module.name.partition('.')[0]
+            packages[package] = packages.get(package, 0) + module.self_ms
+        return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def parse_importtime(lines):
+    imports = []
+    for line in lines:
+        match = IMPORTTIME.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            imports.append(ModuleImport(name, int(own) / 1000, int(cumulative) / 1000, len(indent) // 2))
+    return imports
+
+
+def run_child(module, *options):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'settings.settings')}
+    child = subprocess.run(
+        [sys.executable, *options, '-c', CHILD.format(module=module)],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if child.returncode:
+        raise RuntimeError(f'Starting {module} failed:\n{child.stderr.strip()}')
+    return json.loads(child.stdout.splitlines()[-1]), child.stderr.splitlines()
+
+
+def profile_startup(module='settings.wsgi', runs=3):
+    """Median phase timings over ``runs`` fresh processes, plus one importtime run"""
+    timings = [run_child(module)[0]['phases'] for _ in range(runs)]
+    phases = {phase: statistics.median(run[n] for run in timings) for n, phase in enumerate(PHASES)}
+    result, stderr = run_child(module, '-X', 'importtime')
+    return StartupProfile(phases, parse_importtime(stderr), result['modules'])
@@ -0,0 +1,38 @@
+"""Product listing cards served from a per-product fragment cache.
+
+``{% product_cards page_obj %}`` looks every card of the page up with one
+``get_many``, renders only the missing ones from core/product_card.html and
+stores those with one ``set_many``, so a warm listing page mostly joins
+cached HTML. Keys follow the state each card shows (see
+``core.caching.product_card_key``); hits and misses are counted for
+``/metrics/``.
+"""
+from django import template
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from core.caching import PRODUCT_CARD_TIMEOUT, image_variants_version, product_card_key
+from core.metrics import registry
+
+register = template.Library()
+
+CARD_TEMPLATE = 'core/product_card.html'
+
+
+@register.simple_tag
+def product_cards(products):
+    products = list(products)
+    if not products:
+        return ''
+    version = image_variants_version()
+    keys = [product_card_key(product, version) for product in products]
+    cards = cache.get_many(keys)
+    missing = {key: product for key, product in zip(keys, products) if key not in cards}
+    if missing:
+        card = get_template(CARD_TEMPLATE)
+        rendered = {key: card.render({'product': product}) for key, product in missing.items()}
+        cache.set_many(rendered, PRODUCT_CARD_TIMEOUT)
+        cards.update(rendered)
+    registry.count_fragments('product_card', len(keys) - len(missing), len(missing))
+    return mark_safe(''.join(cards[key] for key in keys))
@@ -0,0 +1,55 @@
+from django import template
+from django.utils.html import format_html
+
+from core.images import read_sidecar, source_for, variant_url
+
+register = template.Library()
+
+DEFAULT_SIZES = '(max-width: 768px) 100vw, 33vw'
+
+
+def _srcset(variants):
+    return ', '.join(f'{variant_url(path)} {width}w' for width, path in variants)
+
+
+@register.simple_tag
+def responsive_img(image, alt='', sizes=DEFAULT_SIZES, css_class='', loading='lazy'):
+    """<picture> with WebP/JPEG srcsets for a static path or ImageField file.
+
+    Falls back to a plain <img> until build_image_variants has run.
+    """
+    key, _, fallback = source_for(image)
+    data = read_sidecar(key)
+    if not data:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="{}">', fallback, alt, css_class, loading)
+
+    webp, jpeg = data['variants']['webp'], data['variants']['jpeg']
+    default = next((path for width, path in jpeg if width >= 640), jpeg[-1][1])
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" loading="{}" decoding="async">'
+        '</picture>',
+        _srcset(webp), sizes, variant_url(default), _srcset(jpeg), sizes,
+        data['width'], data['height'], alt, css_class, loading,
+    )
+
+
+@register.simple_tag
+def responsive_background(image, overlay=''):
+    """``background-image`` declarations preferring the largest WebP variant.
+
+    ``overlay`` is an optional layer, such as a gradient, drawn on top.
+    """
+    key, _, fallback = source_for(image)
+    data = read_sidecar(key)
+    layer = f'{overlay}, ' if overlay else ''
+    if not data:
+        return format_html("background-image: {}url('{}');", layer, fallback)
+
+    webp = variant_url(data['variants']['webp'][-1][1])
+    jpeg = variant_url(data['variants']['jpeg'][-1][1])
+    return format_html(
+        "background-image: {}url('{}'); "
+        "background-image: {}image-set(url('{}') type('image/webp'), url('{}') type('image/jpeg'));",
+        layer, jpeg, layer, webp, jpeg,
+    )
@@ -1,3 +1,1154 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+from datetime import date, time
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Count, Max, Sum
+from django.template import Context, Template, engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.template.loaders.filesystem import Loader as FilesystemLoader
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import (
+    Chief, HistoricalEvent, TourismSite, Product, ProductCategory,
+    Project, ProjectCategory, Bid, Booking, CapacityLedger, CapacityExceeded,
+    ContactMessage, Newsletter
+)
+from .bidding import BidRejected, parse_amount, place_bid
+from .caching import product_card_key, timeline_cache_key
+from .images import build_variants, read_sidecar, variant_builder
+from .management import synthetic
+from .metrics import registry
+from .pagination import paginate_by_cursor
+from .references import BlockSequence, assign_booking_references, format_reference, is_valid
+from .replica import PIN_COOKIE, REFRESHED_KEY, lag_deletes, refresh, replica_reads
+from .search import search_products
+from .sqlite import pragma
+from .startup import ModuleImport, StartupProfile, parse_importtime, profile_startup
+from .timeline import get_timeline
+from .warmup import template_names, warm_templates, warmup
+from .writebehind import WriteBehindQueue, recover
+
+# Keep test renders out of the shared file cache used by the dev server
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_catalog(products=12, bids_per_product=3):
+    """Small but representative dataset shared by the view tests"""
+    category = ProductCategory.objects.create(name='Wood Carvings')
+    for i in range(products):
+        product = Product.objects.create(
+            name=f'Carving {i}',
+            category=category,
+            description='Hand carved by local artists',
+            product_type='physical',
+            price=Decimal('100.00'),
+            starting_bid=Decimal('100.00'),
+            status='bidding',
+            artist_name='Daniel Sapi',
+            featured=True,
+        )
+        for n in range(bids_per_product):
+            Bid.objects.create(
+                product=product,
+                bidder_name=f'Bidder {n}',
+                bidder_email=f'bidder{n}@example.com',
+                bidder_phone='+255710000000',
+                bid_amount=Decimal('110.00') + n,
+            )
+    project_category = ProjectCategory.objects.create(name='Water & Irrigation')
+    for i in range(3):
+        Project.objects.create(
+            title=f'Irrigation {i}',
+            category=project_category,
+            description='Canal works',
+            objectives='Water for farms',
+            location='Kalenga',
+            start_date=date(2024, 1, i + 1),
+            status='ongoing',
+            beneficiaries=100,
+            featured=True,
+        )
+    chief = Chief.objects.create(name='Mkwawa', position=2, reign_start=1879, biography='-', achievements='-')
+    HistoricalEvent.objects.create(title='Battle of Lugalo', date=date(1891, 8, 17), description='-', chief=chief)
+    TourismSite.objects.create(
+        name='Kalenga Museum', site_type='museum', description='-', location='Kalenga',
+        opening_hours='8-5', entry_fee_local=Decimal('5000'), entry_fee_foreign=Decimal('10000'),
+        capacity=50, amenities='-',
+    )
+
+
+class BidCounterTests(TestCase):
+    def setUp(self):
+        create_catalog(products=1, bids_per_product=3)
+        self.product = Product.objects.get()
+
+    def test_new_bid_updates_counters(self):
+        self.assertEqual(self.product.bid_count, 3)
+        self.assertEqual(self.product.current_bid, Decimal('112.00'))
+
+    def test_backfill_recomputes_counters(self):
+        Product.objects.update(bid_count=0, current_bid=None)
+        call_command('backfill_bid_counters', stdout=StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.bid_count, 3)
+        self.assertEqual(self.product.current_bid, Decimal('112.00'))
+
+    def test_deleted_bids_are_recounted(self):
+        self.product.bids.order_by('-bid_amount').first().delete()
+        self.product.refresh_from_db()
+        highest = self.product.bids.aggregate(highest=Max('bid_amount'))['highest']
+        self.assertLess(highest, Decimal('112.00'))
+        self.assertEqual((self.product.bid_count, self.product.current_bid), (2, highest))
+        self.product.bids.all().delete()
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.bid_count, self.product.current_bid), (0, None))
+
+    def test_deleting_the_product_skips_the_recount(self):
+        with self.assertNumQueries(3):  # the bids, their delete, the product; no recount
+            self.product.delete()
+        self.assertFalse(Bid.objects.exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ListingQueryCountTests(TestCase):
+    """Listing pages must not issue per-card queries"""
+
+    def setUp(self):
+        cache.clear()
+        create_catalog(products=12)
+
+    def test_products_page(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('products'))
+        self.assertContains(response, '3 bid(s)', count=12)
+
+    def test_home_page(self):
+        with self.assertNumQueries(5):
+            self.client.get(reverse('home'))
+
+
+class PlaceBidTests(TestCase):
+    def setUp(self):
+        create_catalog(products=1, bids_per_product=0)
+        self.product = Product.objects.get()
+
+    def bid(self, amount):
+        return place_bid(self.product, 'Alice', 'alice@example.com', '+255710000000', amount)
+
+    def test_bid_must_beat_minimum(self):
+        with self.assertRaises(BidRejected) as ctx:
+            self.bid(Decimal('100.00'))
+        self.assertEqual(ctx.exception.minimum, Decimal('100.00'))
+
+    def test_single_winner_and_decimal_snapshot(self):
+        self.bid(Decimal('100.10'))
+        self.bid(Decimal('100.20'))
+        with self.assertRaises(BidRejected):
+            self.bid(Decimal('100.15'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_bid, Decimal('100.20'))
+        self.assertEqual(self.product.bid_count, 2)
+        self.assertEqual(Bid.objects.filter(is_winning=True).get().bid_amount, Decimal('100.20'))
+
+    def test_parse_amount(self):
+        self.assertEqual(parse_amount(' 120.005 '), Decimal('120.00'))
+        self.assertIsNone(parse_amount('abc'))
+        self.assertIsNone(parse_amount('-5'))
+        self.assertIsNone(parse_amount('NaN'))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_catalog(products=2, bids_per_product=0)
+        Product.objects.filter(name='Carving 0').update(name='Ceremonial Spear', artist_name='Saidi Mlawa')
+
+    def test_index_follows_updates(self):
+        results = search_products(Product.objects.all(), 'spear')
+        self.assertEqual([p.name for p in results], ['Ceremonial Spear'])
+
+    def test_prefix_and_user_syntax_is_quoted(self):
+        self.assertEqual(search_products(Product.objects.all(), 'mla').count(), 1)
+        self.assertEqual(search_products(Product.objects.all(), 'spear" OR "carving').count(), 0)
+        self.assertEqual(search_products(Product.objects.all(), '***').count(), 0)
+
+    def test_view_keeps_filters(self):
+        response = self.client.get(reverse('products'), {'search': 'carving', 'status': 'bidding'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        response = self.client.get(reverse('products'), {'search': 'carving', 'status': 'sold'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HomeCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_catalog(products=6, bids_per_product=0)
+        Product.objects.update(status='available')
+
+    def test_warm_home_needs_no_queries(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('home'))
+
+    def test_save_invalidates_only_its_sections(self):
+        self.client.get(reverse('home'))
+        chief = Chief.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            chief.name = 'Mkwawa Mtwa Nyinyka'
+            chief.save()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Mkwawa Mtwa Nyinyka')
+
+    def test_bid_drops_product_from_showcase(self):
+        product = Product.objects.first()
+        self.assertContains(self.client.get(reverse('home')), product.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            place_bid(product, 'Alice', 'alice@example.com', '+255710000000', Decimal('150.00'))
+        self.assertNotContains(self.client.get(reverse('home')), f'>{product.name}<')
+
+
+def book(site, visitors, visit_date=date(2030, 1, 1), **fields):
+    return Booking.objects.create(
+        tourism_site=site, visitor_name='Visitor', visitor_email='visitor@example.com',
+        visitor_phone='+255710000000', visitor_type='local', number_of_visitors=visitors,
+        visit_date=visit_date, visit_time=time(9), total_amount=Decimal('0'), **fields
+    )
+
+
+class CapacityLedgerTests(TestCase):
+    def setUp(self):
+        create_catalog(products=0)
+        self.site = TourismSite.objects.get()
+
+    def booked(self):
+        return CapacityLedger.objects.get(tourism_site=self.site, visit_date=date(2030, 1, 1)).booked_visitors
+
+    def test_refuses_booking_over_capacity(self):
+        book(self.site, 45)
+        with self.assertRaises(CapacityExceeded) as ctx:
+            book(self.site, 6)
+        self.assertEqual(ctx.exception.remaining, 5)
+        book(self.site, 5)
+        self.assertEqual(self.booked(), 50)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_cancel_and_delete_give_places_back(self):
+        booking = book(self.site, 30)
+        other = book(self.site, 20)
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.booked(), 20)
+        booking.status = 'confirmed'
+        booking.save()
+        self.assertEqual(self.booked(), 50)
+        Booking.objects.filter(pk=other.pk).delete()
+        self.assertEqual(self.booked(), 30)
+
+    def test_view_reports_full_day(self):
+        book(self.site, 50)
+        response = self.client.post(reverse('tourism_detail', args=[self.site.slug]), {
+            'visitor_name': 'Late', 'visitor_email': 'late@example.com', 'visitor_phone': '1',
+            'visitor_type': 'local', 'number_of_visitors': 2, 'visit_date': '2030-01-01', 'visit_time': '09:00',
+        }, follow=True)
+        self.assertContains(response, 'Only 0 place(s) left')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_confirmation_shows_contact_details_only_to_the_booking_session(self):
+        response = self.client.post(reverse('tourism_detail', args=[self.site.slug]), {
+            'visitor_name': 'Neema', 'visitor_email': 'neema@example.com', 'visitor_phone': '+255 700',
+            'visitor_type': 'local', 'number_of_visitors': 2, 'visit_date': '2030-01-01', 'visit_time': '09:00',
+            'special_requirements': 'Wheelchair access',
+        })
+        self.assertContains(self.client.get(response.url), 'neema@example.com')
+
+        reference = Booking.objects.get().booking_reference
+        typed = reverse('booking_confirmation', args=[reference.lower()[:7] + '-' + reference[7:]])
+        stranger = self.client_class()
+        response = stranger.get(typed)
+        self.assertContains(response, reference)
+        self.assertContains(response, 'Kalenga Museum')
+        for detail in ('Neema', 'neema@example.com', '+255 700', 'Wheelchair access'):
+            self.assertNotContains(response, detail)
+
+        with self.assertNumQueries(0):
+            response = stranger.get(reverse('booking_confirmation', args=[reference[:-1] + '0']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_view_rejects_unparseable_visitor_count(self):
+        response = self.client.post(reverse('tourism_detail', args=[self.site.slug]), {
+            'visitor_name': 'Typo', 'visitor_email': 'typo@example.com', 'visitor_phone': '1',
+            'visitor_type': 'local', 'number_of_visitors': 'two', 'visit_date': '2030-01-01', 'visit_time': '09:00',
+        }, follow=True)
+        self.assertContains(response, 'Please choose a valid visit date and number of visitors.')
+        self.assertFalse(Booking.objects.exists())
+
+    def test_release_never_goes_negative(self):
+        CapacityLedger.objects.create(tourism_site=self.site, visit_date=date(2030, 1, 1), booked_visitors=2)
+        CapacityLedger.objects.release(self.site.pk, date(2030, 1, 1), 5)
+        self.assertEqual(self.booked(), 0)
+
+    def test_admin_reports_full_day_as_form_error(self):
+        booking = book(self.site, 30)
+        book(self.site, 20)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        fields = {
+            'tourism_site': self.site.pk, 'visit_date': '2030-01-01', 'visit_time': '09:00', 'status': 'confirmed',
+            'visitor_name': 'Visitor', 'visitor_email': 'visitor@example.com', 'visitor_phone': '1',
+            'visitor_type': 'local', 'number_of_visitors': 1, 'total_amount': '0',
+        }
+        response = self.client.post(reverse('admin:core_booking_add'), fields)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Only 0 place(s) left on this date')
+
+        # Editing a booking counts its own places as free
+        change = reverse('admin:core_booking_change', args=[booking.pk])
+        response = self.client.post(change, {**fields, 'number_of_visitors': 31})
+        self.assertContains(response, 'Only 30 place(s) left on this date')
+        response = self.client.post(change, {**fields, 'number_of_visitors': 25})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.booked(), 45)
+
+
+class CapacityConcurrencyTests(TransactionTestCase):
+    """Many visitors booking the same site and day at once must never overbook it"""
+
+    def test_parallel_bookings_respect_capacity(self):
+        create_catalog(products=0)
+        site = TourismSite.objects.get()
+        results = {'booked': 0, 'refused': 0}
+        lock = threading.Lock()
+
+        def visitor():
+            try:
+                for _ in range(5):
+                    while True:
+                        try:
+                            book(site, 3)
+                            outcome = 'booked'
+                        except CapacityExceeded:
+                            outcome = 'refused'
+                        except OperationalError:
+                            continue  # database locked by another writer; retry
+                        break
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=visitor) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        visitors = sum(Booking.objects.values_list('number_of_visitors', flat=True))
+        self.assertEqual(results['booked'], 16)
+        self.assertEqual(results['refused'], 24)
+        self.assertEqual(visitors, 48)
+        self.assertEqual(CapacityLedger.objects.get().booked_visitors, 48)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AvailabilityCalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_catalog(products=0)
+        self.site = TourismSite.objects.get()
+        self.url = reverse('site_availability', args=[self.site.slug])
+
+    def calendar(self, url=None):
+        response = self.client.get(url or self.url, {'start': '2030-01-01', 'days': 90})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['sites'][0]['remaining']
+
+    def test_remaining_places_per_day(self):
+        book(self.site, 20)
+        book(self.site, 5, visit_date=date(2030, 1, 3))
+        remaining = self.calendar()
+        self.assertEqual(len(remaining), 90)
+        self.assertEqual(remaining['2030-01-01'], 30)
+        self.assertEqual(remaining['2030-01-02'], 50)
+        self.assertEqual(remaining['2030-01-03'], 45)
+        self.assertEqual(self.calendar(reverse('tourism_availability'))['2030-01-01'], 30)
+
+    def test_cached_until_a_booking_changes(self):
+        self.calendar()
+        with self.assertNumQueries(1):  # site lookup only
+            self.calendar()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = book(self.site, 10)
+        self.assertEqual(self.calendar()['2030-01-01'], 40)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'cancelled'
+            booking.save()
+        self.assertEqual(self.calendar()['2030-01-01'], 50)
+
+    def test_rejects_bad_range(self):
+        self.assertEqual(self.client.get(self.url, {'days': 1000}).status_code, 400)
+
+
+class ResponsiveImageTests(TestCase):
+    def render(self, source):
+        return Template('{% load responsive_images %}{% responsive_img source alt="Spear" %}').render(
+            Context({'source': source})
+        )
+
+    def test_variants_and_fallback(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            source = 'products/product_nyanya.jpeg'
+            self.assertIn('<img src="/static/products/product_nyanya.jpeg"', self.render(source))
+
+            data = build_variants(f'static/{source}', finders.find(source))
+            self.assertEqual([w for w, _ in data['variants']['webp']], [320, 640, 960, 1080])
+            html = self.render(source)
+            self.assertIn('<source type="image/webp"', html)
+            self.assertIn(f'product_nyanya-{data["hash"]}-320.webp 320w', html)
+            self.assertIn('alt="Spear"', html)
+
+    @override_settings(CACHES=TEST_CACHES)
+    def test_upload_builds_variants_off_the_request_and_retires_cards(self):
+        cache.clear()
+        create_catalog(products=1, bids_per_product=0)
+        product = Product.objects.select_related('category').get()
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            os.makedirs(os.path.join(media_root, 'products'))
+            with open(finders.find('products/product_nyanya.jpeg'), 'rb') as source:
+                with open(os.path.join(media_root, 'products', 'upload.jpeg'), 'wb') as upload:
+                    upload.write(source.read())
+            self.client.get(reverse('products'))
+            card = product_card_key(product)
+
+            product.image = 'products/upload.jpeg'
+            with mock.patch.object(variant_builder, 'submit') as submit, \
+                    self.captureOnCommitCallbacks(execute=True):
+                product.save()
+            self.assertIsNone(read_sidecar('media/products/upload.jpeg'))
+            key, path, on_built = submit.call_args.args
+            self.assertEqual(key, 'media/products/upload.jpeg')
+
+            with self.captureOnCommitCallbacks(execute=True):
+                variant_builder.pending[key] = (path, on_built)
+                self.assertEqual(variant_builder.flush(), 1)
+            self.assertIsNotNone(read_sidecar(key))
+            self.assertNotEqual(product_card_key(product), card)
+            self.assertContains(self.client.get(reverse('products')), 'upload-')
+
+            # Saving again with the same file queues nothing
+            with mock.patch.object(variant_builder, 'submit') as submit, \
+                    self.captureOnCommitCallbacks(execute=True):
+                product.save()
+            submit.assert_not_called()
+
+
+@override_settings(CACHES=TEST_CACHES, PRODUCTS_CURSOR_PAGINATION=True)
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_catalog(products=30, bids_per_product=0)
+
+    def walk(self):
+        names, cursor = [], None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            page = self.client.get(reverse('products'), params).context['page_obj']
+            names.extend(p.name for p in page)
+            if not page.has_next():
+                return names, page
+            cursor = page.next_cursor
+
+    def test_walks_catalog_in_order_without_count(self):
+        expected = list(Product.objects.order_by('-created_at', 'id').values_list('name', flat=True))
+        self.assertEqual(self.walk()[0], expected)
+        self.client.get(reverse('products'))
+        with self.assertNumQueries(2):  # categories + one page; the total is cached
+            self.client.get(reverse('products'))
+
+    def test_pages_are_stable_under_inserts(self):
+        first = self.client.get(reverse('products')).context['page_obj']
+        for i in range(5):
+            Product.objects.create(name=f'New {i}', description='-', product_type='nft', price=1, artist_name='-')
+        second = paginate_by_cursor(Product.objects.all(), first.next_cursor, 12)
+        self.assertEqual(second.object_list[0].name, 'Carving 17')
+        previous = paginate_by_cursor(Product.objects.all(), second.previous_cursor, 12)
+        self.assertEqual([p.pk for p in previous], [p.pk for p in first])
+
+    def test_bad_cursor_restarts(self):
+        response = self.client.get(reverse('products'), {'cursor': 'garbage', 'type': 'physical'})
+        self.assertRedirects(response, reverse('products') + '?type=physical')
+
+    def test_search_keeps_rank_order_on_numbered_pages(self):
+        Product.objects.filter(name='Carving 3').update(name='Carving 3 carving carving')
+        response = self.client.get(reverse('products'), {'search': 'carving', 'cursor': 'ignored'})
+        self.assertFalse(response.context['cursor_mode'])
+        self.assertEqual(response.context['page_obj'][0].name, 'Carving 3 carving carving')
+        self.assertEqual(response.context['total'], 30)
+
+    def test_total_stops_counting_at_the_cap(self):
+        with mock.patch('core.views.ESTIMATE_CAP', 10), mock.patch('core.pagination.ESTIMATE_CAP', 10):
+            response = self.client.get(reverse('products'))
+        self.assertContains(response, 'of more than <strong>10</strong> products')
+
+
+class QueryPlanTests(TestCase):
+    """The listing queries must be served by an index, not a scan and sort"""
+
+    def setUp(self):
+        create_catalog(products=2, bids_per_product=2)
+
+    def assertUsesIndex(self, queryset, index):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        self.assertRegex(plan, rf'USING (COVERING )?INDEX {index}\b')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_home_and_listing_queries(self):
+        product = Product.objects.first()
+        chief = Chief.objects.get()
+        self.assertUsesIndex(Product.objects.filter(featured=True, status='available')[:6], 'product_featured_idx')
+        self.assertUsesIndex(Project.objects.filter(featured=True, status='ongoing')[:3], 'project_featured_idx')
+        self.assertUsesIndex(TourismSite.objects.filter(is_active=True)[:3], 'site_active_type_idx')
+        self.assertUsesIndex(TourismSite.objects.filter(is_active=True, site_type='museum'), 'site_active_type_idx')
+        self.assertUsesIndex(Bid.objects.filter(product=product, is_winning=True), 'bid_product_winning_idx')
+        self.assertUsesIndex(chief.events.all(), 'event_chief_date_idx')
+
+
+class SyntheticSeedTests(TestCase):
+    """Bulk-generated rows must look exactly like rows saved one at a time"""
+
+    def setUp(self):
+        create_catalog(products=1, bids_per_product=1)
+
+    def test_bulk_products_keep_bid_counters(self):
+        synthetic.bulk_products(list(ProductCategory.objects.all()), 10, 35, random.Random(1), batch_size=4)
+        products = Product.objects.exclude(name='Carving 0').annotate(bids_made=Count('bids'), top=Max('bids__bid_amount'))
+        self.assertEqual(products.count(), 10)
+        self.assertEqual(sum(product.bids_made for product in products), 35)
+        for product in products:
+            self.assertEqual(product.bid_count, product.bids_made)
+            self.assertEqual(product.current_bid, product.top)
+            self.assertEqual(product.bids.filter(is_winning=True).get().bid_amount, product.top)
+
+    def test_bulk_bookings_fill_the_ledger(self):
+        site = TourismSite.objects.get()
+        synthetic.bulk_bookings([site], 400, random.Random(1), batch_size=64)
+        booked = Booking.objects.exclude(status='cancelled').values('visit_date').annotate(total=Sum('number_of_visitors'))
+        ledger = dict(CapacityLedger.objects.values_list('visit_date', 'booked_visitors'))
+        self.assertEqual(ledger, {row['visit_date']: row['total'] for row in booked})
+        self.assertLessEqual(max(ledger.values()), site.capacity)
+        self.assertEqual(Booking.objects.values('booking_reference').distinct().count(), 400)
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_TOKEN='s3cret', SERVER_TIMING=True)
+class PerformanceMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        create_catalog(products=3, bids_per_product=1)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('products'))
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="[1-9]\d* queries", tpl;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+        with override_settings(SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('products')))
+
+    def test_histograms_per_view(self):
+        self.client.get(reverse('products'))
+        self.client.get(reverse('products'))
+        self.client.get('/no-such-page/')
+        views = registry.snapshot()
+        self.assertEqual(views['products']['total_ms']['count'], 2)
+        self.assertEqual(views['products']['total_ms']['buckets']['+Inf'], 2)
+        self.assertGreater(views['products']['template_ms']['sum'], 0)
+        self.assertIn('<unresolved>', views)
+
+    def test_metrics_endpoint_is_protected(self):
+        self.client.get(reverse('home'))
+        url = reverse('performance_metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.json()['views']['home']['queries']['count'], 1)
+
+
+@override_settings(CACHES=TEST_CACHES, ROOT_URLCONF='settings.asgi_urls', SERVER_TIMING=True)
+class AsyncViewTests(TestCase):
+    """The ASGI URLconf serves the read-only pages from core.async_views"""
+
+    def setUp(self):
+        cache.clear()
+        create_catalog(products=14, bids_per_product=2)
+        Product.objects.filter(name__in=['Carving 0', 'Carving 1']).update(status='available')
+
+    async def test_pages_render_the_same_data(self):
+        site = await TourismSite.objects.aget()
+        booking = await Booking.objects.acreate(
+            tourism_site=site, visitor_name='Asha', visitor_email='asha@example.com', visitor_phone='+255',
+            visitor_type='local', number_of_visitors=2, visit_date=date(2030, 1, 1), visit_time=time(9),
+            total_amount=Decimal('10000'),
+        )
+        pages = {
+            reverse('home'): ['Carving 1', 'Irrigation 2', 'Battle of Lugalo', 'Kalenga Museum'],
+            reverse('heritage'): ['Battle of Lugalo', 'Mkwawa'],
+            reverse('chief_detail', args=['mkwawa']): ['Mkwawa'],
+            reverse('tourism'): ['Kalenga Museum'],
+            reverse('tourism_detail', args=[site.slug]): ['Kalenga Museum'],
+            reverse('booking_confirmation', args=[booking.booking_reference]): ['Kalenga Museum'],
+            reverse('products') + '?page=2': ['Carving 1', 'Page 2 of 2'],
+            reverse('products') + '?search=carving': ['Carving 13'],
+            reverse('product_detail', args=['carving-3']): ['Carving 3', 'Bidder 1'],
+            reverse('projects'): ['Irrigation 0', 'Water &amp; Irrigation'],
+            reverse('project_detail', args=['irrigation-1']): ['Irrigation 1'],
+        }
+        for url, expected in pages.items():
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            for text in expected:
+                self.assertContains(response, text, msg_prefix=url)
+        response = await self.async_client.get(reverse('product_detail', args=['no-such-product']))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_server_timing_counts_async_queries(self):
+        response = await self.async_client.get(reverse('projects'))
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+    async def test_warm_home_needs_no_queries(self):
+        await self.async_client.get(reverse('home'))
+        response = await self.async_client.get(reverse('home'))
+        self.assertIn('desc="0 queries"', response['Server-Timing'])
+        self.assertContains(response, 'Carving 1')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StaticAssetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_hashed_gzipped_and_cached_for_a_year(self):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            stylesheet = staticfiles_storage.stored_name('css/products.css')
+            self.assertRegex(stylesheet, r'^css/products\.[0-9a-f]{12}\.css$')
+            self.assertContains(self.client.get(reverse('products')), f'/static/{stylesheet}')
+
+            response = self.client.get(f'/static/{stylesheet}', HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Content-Type'], 'text/css')
+            self.assertIn(b'.products-hero', gzip.decompress(b''.join(response.streaming_content)))
+
+            response = self.client.get('/static/css/products.css')
+            self.assertEqual(response['Cache-Control'], 'no-cache')
+            self.assertNotIn('Content-Encoding', response)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_catalog(products=1, bids_per_product=2)
+        self.url = reverse('product_detail', args=['carving-0'])
+
+    def revalidate(self, url):
+        self.client.get(url)  # sets the CSRF cookie the ETag includes
+        etag = self.client.get(url)['ETag']
+        return etag, self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_page_is_not_rendered(self):
+        etag, response = self.revalidate(self.url)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('no-cache', response['Cache-Control'])
+        with self.assertNumQueries(1):
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        for url in [reverse('chief_detail', args=['mkwawa']), reverse('tourism_detail', args=['kalenga-museum']),
+                    reverse('project_detail', args=['irrigation-0'])]:
+            self.assertEqual(self.revalidate(url)[1].status_code, 304, url)
+
+    def test_new_bid_or_event_changes_the_validator(self):
+        etag, _ = self.revalidate(self.url)
+        self.client.post(self.url, {'bidder_name': 'Zawadi', 'bidder_email': 'z@example.com',
+                                    'bidder_phone': '+255', 'bid_amount': '500'})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Your bid has been placed successfully!')
+
+        url = reverse('chief_detail', args=['mkwawa'])
+        etag, _ = self.revalidate(url)
+        event = HistoricalEvent.objects.get()
+        event.title = 'Battle of Lugalo, 1891'
+        with self.captureOnCommitCallbacks(execute=True):
+            event.save()
+        self.assertContains(self.client.get(url, HTTP_IF_NONE_MATCH=etag), 'Battle of Lugalo, 1891')
+
+    def test_pending_message_forces_a_render(self):
+        etag, _ = self.revalidate(self.url)
+        self.client.post(self.url, {'bid_amount': 'abc'})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Please enter a valid bid amount')
+
+    @override_settings(ROOT_URLCONF='settings.asgi_urls')
+    async def test_async_view(self):
+        await self.async_client.get(self.url)
+        etag = (await self.async_client.get(self.url))['ETag']
+        response = await self.async_client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+
+class SQLiteProfileTests(TestCase):
+    def test_new_connections_get_the_production_pragmas(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = connections.create_connection('default')
+            db.settings_dict = {**db.settings_dict, 'NAME': f'{tmp}/profile.sqlite3'}
+            try:
+                self.assertEqual(pragma(db, 'journal_mode'), 'wal')
+                self.assertEqual(pragma(db, 'synchronous'), 1)  # NORMAL
+                self.assertEqual(pragma(db, 'busy_timeout'), 20000)
+                self.assertEqual(db.transaction_mode, 'IMMEDIATE')
+            finally:
+                db.close()
+
+
+@override_settings(WRITE_BEHIND=True)
+class WriteBehindTests(TransactionTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.queue = WriteBehindQueue(directory=self.tmp.name, autostart=False)
+
+    def contact(self, n):
+        return {'name': f'Visitor {n}', 'email': f'v{n}@example.com', 'phone': '', 'subject': 'Visit', 'message': '-'}
+
+    def test_rows_are_written_in_one_batch(self):
+        for n in range(3):
+            self.queue.submit('contact', self.contact(n))
+        self.queue.submit('newsletter', {'email': 'a@example.com', 'name': 'A'})
+        self.queue.submit('newsletter', {'email': 'a@example.com', 'name': 'A'})
+        self.assertEqual(ContactMessage.objects.count(), 0)
+        with self.assertNumQueries(4):  # savepoint, two inserts, release
+            self.assertEqual(self.queue.flush(), 5)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+        self.assertEqual(Newsletter.objects.count(), 1)
+        self.assertEqual(os.path.getsize(self.queue.path), 0)
+
+    def test_rows_of_a_dead_process_are_replayed_once(self):
+        self.queue.submit('contact', self.contact(0))
+        self.queue.flush()
+        self.queue.submit('contact', self.contact(1))
+        os.close(self.queue.fd)  # the process dies with one row pending
+
+        out = StringIO()
+        with override_settings(WRITE_BEHIND_DIR=self.tmp.name), self.assertLogs('core.writebehind', 'WARNING'):
+            call_command('flush_write_behind', stdout=out)
+        self.assertIn('Replayed 1 queued', out.getvalue())
+        self.assertEqual(ContactMessage.objects.count(), 2)
+        self.assertEqual(recover(self.tmp.name), 0)
+
+    def test_full_queue_writes_synchronously(self):
+        with override_settings(WRITE_BEHIND_MAX_PENDING=1):
+            self.queue.submit('contact', self.contact(0))
+            self.queue.submit('contact', self.contact(1))
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(self.queue.flush(), 1)
+
+    def test_invalid_rows_are_refused_before_queueing(self):
+        with self.assertRaises(ValidationError):
+            self.queue.submit('contact', {**self.contact(0), 'email': 'not-an-email'})
+        with self.assertRaises(ValidationError):
+            self.queue.submit('newsletter', {'email': None, 'name': ''})
+        self.assertIsNone(self.queue.fd)
+        response = self.client.post(reverse('contact'), {**self.contact(0), 'subject': ''}, follow=True)
+        self.assertContains(response, 'Subject: This field cannot be blank.')
+        self.assertEqual(ContactMessage.objects.count(), 0)
+
+
+class SubscriptionViewTests(TestCase):
+    def test_subscribe_then_resubscribe(self):
+        url = reverse('newsletter_subscribe')
+        response = self.client.post(url, {'email': 'a@example.com'}, follow=True)
+        self.assertContains(response, 'Successfully subscribed')
+        # No lookup first: the savepoint around the INSERT OR IGNORE only
+        with self.assertNumQueries(3):
+            self.client.post(url, {'email': ' A@Example.com'})
+        self.assertEqual(list(Newsletter.objects.values_list('email', flat=True)), ['a@example.com'])
+
+
+class NewsletterImportExportTests(TestCase):
+    def import_csv(self, text, **options):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write(text)
+        self.addCleanup(os.unlink, fh.name)
+        out = StringIO()
+        call_command('import_newsletter', fh.name, stdout=out, **options)
+        return out.getvalue()
+
+    def test_import_normalises_and_dedupes(self):
+        Newsletter.objects.create(email='old@example.com', name='Old')
+        out = self.import_csv(
+            'Name,E-mail\nAsha, Asha@Example.com \nAsha again,asha@example.com\n'
+            'Old,OLD@example.com\nNobody,not-an-email\nBaraka,baraka@example.com\n',
+            chunk_size=2,
+        )
+        self.assertIn('Imported 2 new subscribers from 5 rows (1 invalid', out)
+        self.assertEqual(
+            dict(Newsletter.objects.values_list('email', 'name')),
+            {'old@example.com': 'Old', 'asha@example.com': 'Asha', 'baraka@example.com': 'Baraka'},
+        )
+
+    def test_import_without_header(self):
+        self.import_csv('a@example.com\nb@example.com,Bee\n')
+        self.assertEqual(Newsletter.objects.get(email='b@example.com').name, 'Bee')
+        self.assertEqual(Newsletter.objects.count(), 2)
+
+    def test_admin_export_streams_active_subscribers(self):
+        Newsletter.objects.create(email='a@example.com', name='=HYPERLINK("x")')
+        Newsletter.objects.create(email='b@example.com', is_active=False)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.post(reverse('admin:core_newsletter_changelist'), {
+            'action': 'export_active', '_selected_action': Newsletter.objects.values_list('pk', flat=True),
+        })
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'email,name,subscribed_at')
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('a@example.com,"\'=HYPERLINK(""x"")"'))
+
+
+class BookingExportTests(TestCase):
+    def setUp(self):
+        create_catalog(products=0, bids_per_product=0)
+        site = TourismSite.objects.get()
+        for n, (visitor_type, status) in enumerate([('local', 'confirmed'), ('foreign', 'confirmed'),
+                                                    ('local', 'cancelled')]):
+            Booking.objects.create(
+                tourism_site=site, visitor_name=f'Visitor {n}', visitor_email='v@example.com',
+                visitor_phone='+255 710 000 000', visitor_type=visitor_type, number_of_visitors=1,
+                visit_date=date(2025, 1, n + 1), visit_time=time(10), total_amount=Decimal('5000'),
+                status=status,
+            )
+
+    def test_command_filters_and_streams(self):
+        out = StringIO()
+        call_command('export_bookings', status='confirmed', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['reference', 'site', 'visit_date'])
+        self.assertEqual(len(lines), 3)
+        self.assertIn(',Kalenga Museum,2025-01-01,10:00:00,Visitor 0,v@example.com,+255 710 000 000,', lines[1])
+
+        out = StringIO()
+        call_command('export_bookings', visitor_type='local', date_from=date(2025, 1, 2), stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+    def test_admin_export_uses_changelist_filters(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        changelist = self.client.get(reverse('admin:core_booking_changelist'), {'status__exact': 'confirmed'})
+        self.assertContains(changelist, reverse('admin:core_booking_export') + '?status__exact=confirmed')
+
+        with self.assertNumQueries(5):  # session, user, two site filter choices, the export
+            response = self.client.get(reverse('admin:core_booking_export'),
+                                       {'status__exact': 'confirmed', 'visitor_type__exact': 'foreign'})
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Visitor 1', lines[1])
+
+
+class BookingReferenceTests(TestCase):
+    def test_check_symbol_catches_single_typos(self):
+        reference = format_reference(123456789)
+        self.assertEqual(len(reference), 12)
+        self.assertTrue(is_valid(reference.lower()[:7] + '-' + reference[7:]))
+        for position in range(3, 12):
+            for symbol in '0123456789ABCDEFGHJKMNPQRSTVWXYZ':
+                typo = reference[:position] + symbol + reference[position + 1:]
+                if typo != reference:
+                    self.assertFalse(is_valid(typo), typo)
+
+    def test_one_round_trip_per_block(self):
+        numbers = BlockSequence('booking_reference', block_size=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = numbers.take()
+        with self.assertNumQueries(0):
+            rest = numbers.take(9)
+        self.assertEqual(first + rest, list(range(first[0], first[0] + 10)))
+        self.assertEqual(numbers.take(), [first[0] + 10])
+
+    def test_block_of_a_rolled_back_transaction_is_not_reused(self):
+        numbers = BlockSequence('booking_reference', block_size=10)
+        try:
+            with transaction.atomic():
+                numbers.take()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with self.assertNumQueries(4):  # a fresh block: savepoint, update, select, release
+            numbers.take()
+
+    def test_bookings_and_bulk_create_get_references(self):
+        create_catalog(products=0)
+        booking = book(TourismSite.objects.get(), 2)
+        self.assertTrue(is_valid(booking.booking_reference))
+        bookings = assign_booking_references([Booking(booking_reference='KEEP'), Booking(), Booking()])
+        self.assertEqual(bookings[0].booking_reference, 'KEEP')
+        self.assertEqual(len({booking.booking_reference for booking in bookings}), 3)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HeritageTimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_catalog(products=0)
+        chief = Chief.objects.get()
+        HistoricalEvent.objects.create(title='Kalenga fort', date=date(1887, 3, 1), description='-', chief=chief)
+        HistoricalEvent.objects.create(title='Skull returned', date=date(1954, 7, 9), description='-')
+
+    def test_grouped_by_decade_with_year_histogram(self):
+        with self.assertNumQueries(3):
+            timeline = get_timeline()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_timeline(), timeline)
+        self.assertEqual([event.title for event in timeline.events], ['Skull returned', 'Battle of Lugalo', 'Kalenga fort'])
+        self.assertEqual([(decade, len(events)) for decade, events in timeline.decades], [(1950, 1), (1890, 1), (1880, 1)])
+        self.assertEqual([(bar.year, bar.count) for bar in timeline.years], [(1887, 1), (1891, 1), (1954, 1)])
+        self.assertEqual([(chief.slug, count) for chief, count in timeline.filters], [('mkwawa', 2)])
+
+        with self.assertNumQueries(0):
+            mkwawa = get_timeline('mkwawa')
+        self.assertEqual([event.title for event in mkwawa.events], ['Battle of Lugalo', 'Kalenga fort'])
+        self.assertEqual(get_timeline('nobody').events, [])
+        self.assertIsNone(cache.get(timeline_cache_key(timeline.version, 'nobody')))
+
+    def test_rebuilt_when_an_event_changes(self):
+        self.assertContains(self.client.get(reverse('heritage')), 'Kalenga fort')
+        with self.captureOnCommitCallbacks(execute=True):
+            HistoricalEvent.objects.filter(title='Kalenga fort').get().delete()
+        response = self.client.get(reverse('heritage'))
+        self.assertNotContains(response, 'Kalenga fort')
+        self.assertContains(response, 'id="year-1954"')
+        self.assertContains(response, 'Mkwawa (1)')
+
+    def test_chief_detail_reads_the_timeline(self):
+        get_timeline('mkwawa')
+        with self.assertNumQueries(1):  # the conditional GET validator
+            response = self.client.get(reverse('chief_detail', args=['mkwawa']))
+        self.assertContains(response, 'Kalenga fort')
+        self.assertNotContains(response, 'Skull returned')
+        self.assertEqual(self.client.get(reverse('chief_detail', args=['nobody'])).status_code, 404)
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_TOKEN='s3cret')
+class ProductCardCacheTests(TestCase):
+    """Listing cards are cached per product and follow its updates and bids"""
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        create_catalog(products=3, bids_per_product=1)
+
+    def test_warm_page_reuses_every_card(self):
+        self.client.get(reverse('products'))
+        self.assertContains(self.client.get(reverse('products')), '<div class="product-card-luxury">', count=3)
+        self.assertEqual(
+            registry.fragment_snapshot()['product_card'], {'hits': 3, 'misses': 3, 'hit_ratio': 0.5}
+        )
+        response = self.client.get(reverse('performance_metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.json()['fragments']['product_card']['hits'], 3)
+
+    def test_card_follows_bids_and_edits(self):
+        product = Product.objects.select_related('category').get(slug='carving-0')
+        self.client.get(reverse('products'))
+        Bid.objects.create(
+            product=product, bidder_name='Asha', bidder_email='asha@example.com',
+            bidder_phone='0700', bid_amount=Decimal('500.00'),
+        )
+        response = self.client.get(reverse('products'))
+        self.assertContains(response, '2 bid(s)')
+        self.assertContains(response, '$500.00')
+
+        product.name = 'Renamed carving'
+        product.save()
+        ProductCategory.objects.update(name='Sculpture')
+        response = self.client.get(reverse('products'))
+        self.assertContains(response, 'Renamed carving')
+        self.assertContains(response, '<span class="product-category-tag">Sculpture</span>', count=3)
+        self.assertNotEqual(product_card_key(product), product_card_key(Product.objects.select_related('category').get(pk=product.pk)))
+
+    def test_empty_listing(self):
+        response = self.client.get(reverse('products'), {'search': 'nothing matches this'})
+        self.assertContains(response, 'No Products Found')
+        self.assertNotIn('product_card', registry.fragment_snapshot())
+
+
+class TemplateWarmupTests(TestCase):
+    """Worker startup compiles the project templates into the cached loader"""
+
+    def setUp(self):
+        self.engine = engines.all()[0].engine
+        self.loader = self.engine.template_loaders[0]
+        self.loader.reset()
+
+    def test_every_project_template_is_cached(self):
+        self.assertIsInstance(self.loader, CachedLoader)
+        self.assertEqual(warm_templates(), len(list(template_names(self.engine))))
+        self.assertIn('base.html', self.loader.get_template_cache)
+        self.assertIn('core/products.html', self.loader.get_template_cache)
+        with mock.patch.object(FilesystemLoader, 'get_contents') as read:
+            self.client.get(reverse('contact'))
+        read.assert_not_called()
+
+    @override_settings(TEMPLATE_WARMUP=False)
+    def test_warmup_can_be_switched_off(self):
+        warmup()
+        self.assertEqual(self.loader.get_template_cache, {})
+
+
+class RouteBenchTests(TestCase):
+    """manage.py bench times the timed runs, even with no warmup"""
+
+    def test_bench_without_warmup(self):
+        with self.assertRaisesMessage(CommandError, '--iterations must be at least 2'):
+            call_command('bench', iterations=1, stdout=StringIO())
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(connection.creation, 'create_test_db', return_value=None), \
+                mock.patch.object(connection.creation, 'destroy_test_db'):
+            call_command(
+                'bench', iterations=2, warmup=0, memory_iterations=0, route=['products', 'contact POST'],
+                output=f'{tmp}/bench.json', stdout=StringIO(),
+            )
+            with open(f'{tmp}/bench.json') as fh:
+                routes = json.load(fh)['routes']
+        self.assertEqual(set(routes), {'products', 'products search', 'contact POST'})
+        self.assertEqual(routes['products']['status'], 200)
+        self.assertEqual(routes['contact POST']['status'], 302)
+        self.assertIsNone(routes['products']['alloc_kib'])
+
+
+class StartupProfileTests(TestCase):
+    """A fresh worker starts within budget and leaves Pillow unimported"""
+
+    def test_parse_importtime(self):
+        imports = parse_importtime([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |   core.metrics',
+            'import time:      1500 |       1620 | core.signals',
+        ])
+        self.assertEqual(imports, [
+            ModuleImport('core.metrics', 0.12, 0.12, 1), ModuleImport('core.signals', 1.5, 1.62, 0),
+        ])
+
+    def test_worker_startup(self):
+        # How long it takes is the command's to report (timings vary with
+        # the machine's load); what a worker imports is not
+        profile = profile_startup('settings.wsgi', runs=1)
+        self.assertIn('core.views', profile.modules)
+        self.assertNotIn('PIL.Image', profile.modules)
+        self.assertTrue(any(module.name == 'core.signals' for module in profile.imports))
+
+    def test_budget_is_enforced(self):
+        profile = StartupProfile({'django': 150.0, 'setup': 400.0, 'application': 250.0, 'urls': 100.0}, [], [])
+        with mock.patch('core.management.commands.profile_startup.profile_startup', return_value=profile):
+            out = StringIO()
+            call_command('profile_startup', budget=1000, stdout=out)
+            self.assertRegex(out.getvalue(), r'total +900.0 ms \(budget 1000 ms\)')
+            self.assertIn('[OK] Startup within budget', out.getvalue())
+            with self.assertRaisesMessage(CommandError, 'Startup took 900 ms, over the 800 ms budget'):
+                call_command('profile_startup', budget=800, stdout=StringIO())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ReadReplicaTests(TransactionTestCase):
+    """Public pages read the replica; writes and the pages after them use the primary"""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        create_catalog(products=2)
+
+    def queries(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(url)
+        return response, len(primary), len(replica)
+
+    def test_public_pages_read_a_fresh_replica(self):
+        _, primary, replica = self.queries(reverse('products'))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        refresh()
+        product = Product.objects.get(name='Carving 0')
+        product.name = 'Renamed on the primary'
+        product.save()
+        response, primary, replica = self.queries(reverse('products'))
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertContains(response, 'Carving 0')
+
+        refresh()
+        self.assertContains(self.client.get(reverse('products')), 'Renamed on the primary')
+
+        cache.set(REFRESHED_KEY, cache.get(REFRESHED_KEY) - settings.REPLICA_MAX_LAG, None)
+        self.assertEqual(self.queries(reverse('products'))[2], 0)
+
+    def test_booking_confirmation_after_the_redirect(self):
+        refresh()
+        response = self.client.post(reverse('tourism_detail', args=['kalenga-museum']), {
+            'visitor_name': 'Neema', 'visitor_email': 'neema@example.com', 'visitor_phone': '1',
+            'visitor_type': 'local', 'number_of_visitors': 2, 'visit_date': '2030-01-01', 'visit_time': '09:00',
+        })
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_MAX_LAG)
+        self.assertEqual(self.client.get(response.url).status_code, 200)
+
+        # Without the cookie the replica, which has no copy yet, is asked
+        # first and the primary after it
+        self.client.cookies.pop(PIN_COOKIE)
+        confirmation, primary, replica = self.queries(response.url)
+        self.assertContains(confirmation, 'neema@example.com')
+        self.assertEqual(replica, 1)
+        self.assertGreater(primary, 0)
+        missing = response.url.replace(response.url.split('/')[-2], 'MKW00000000')
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_reads_after_a_write_use_the_primary(self):
+        refresh()
+
+        @replica_reads
+        def view(request):
+            product = Product.objects.get(name='Carving 0')
+            read_from = product._state.db
+            product.save()
+            return read_from, Product.objects.get(name='Carving 0')._state.db
+
+        self.assertEqual(view(RequestFactory().get('/')), ('replica', 'default'))
+
+    def test_invalidations_repeat_once_the_replica_caught_up(self):
+        refresh()
+        key = make_template_fragment_key('home_chiefs')
+        Chief.objects.get().save()
+        cache.set(key, 'rendered from the replica before it had the change', None)
+        lag_deletes.flush()
+        self.assertIsNone(cache.get(key))
@@ -0,0 +1,109 @@
+"""The heritage timeline, built once and cached until the history changes.
+
+``get_timeline(chief_slug)`` returns every chief and the events (all of them,
+or one chief's) grouped by decade, with the event count of each chief and a
+per-year histogram the page navigates by. Building it takes three queries:
+the chiefs, their events in one prefetch, and the events without a chief.
+Events are kept as plain tuples so a cached timeline unpickles quickly.
+
+Timelines are cached under a version token that ``core.signals`` replaces
+whenever a Chief or HistoricalEvent is saved or deleted. Only the full
+timeline and those of existing chiefs are cached, so arbitrary ``?chief=``
+values cannot fill the cache.
+"""
+from itertools import groupby
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .caching import TIMELINE_TIMEOUT, timeline_cache_key, timeline_version
+from .models import Chief, HistoricalEvent
+
+
+class TimelineEvent(NamedTuple):
+    title: str
+    slug: str
+    date: object
+    description: str
+    image_url: str
+    chief_name: str
+    chief_slug: str
+
+
+class YearBar(NamedTuple):
+    year: int
+    count: int
+    height: int  # percent of the busiest year
+
+
+class Timeline(NamedTuple):
+    version: str
+    chief_slug: str  # '' for every chief's events
+    chiefs: list
+    events: list  # newest first
+    decades: list  # [(1890, [events...]), ...], newest first
+    years: list  # YearBar per year that has events, oldest first
+    filters: list  # [(chief, number of events), ...] for the filter buttons
+
+    def chief(self, slug):
+        return next((chief for chief in self.chiefs if chief.slug == slug), None)
+
+
+def event_tuple(event, chief):
+    return TimelineEvent(
+        event.title, event.slug, event.date, event.description,
+        event.image.url if event.image else '', chief.name if chief else '', chief.slug if chief else '',
+    )
+
+
+def build_events():
+    """Chiefs and all events, newest first"""
+    events_by_date = HistoricalEvent.objects.order_by('-date', 'pk')
+    chiefs = list(Chief.objects.prefetch_related(Prefetch('events', queryset=events_by_date, to_attr='timeline')))
+    events = []
+    for chief in chiefs:
+        events += [event_tuple(event, chief) for event in chief.timeline]
+        del chief.timeline  # the cached chiefs would carry every event twice
+    events += [event_tuple(event, None) for event in events_by_date.filter(chief__isnull=True)]
+    events.sort(key=lambda event: event.date, reverse=True)
+    return chiefs, events
+
+
+def assemble(version, chief_slug, chiefs, events, filters):
+    """Group ``events`` by decade and count them per year"""
+    decades = [
+        (decade, list(group)) for decade, group in groupby(events, key=lambda event: event.date.year // 10 * 10)
+    ]
+    per_year = {}
+    for event in events:
+        per_year[event.date.year] = per_year.get(event.date.year, 0) + 1
+    busiest = max(per_year.values(), default=1)
+    years = [YearBar(year, count, max(count * 100 // busiest, 4)) for year, count in sorted(per_year.items())]
+    return Timeline(version, chief_slug, chiefs, events, decades, years, filters)
+
+
+def get_timeline(chief_slug=''):
+    version = timeline_version()
+    key = timeline_cache_key(version, chief_slug)
+    timeline = cache.get(key)
+    if timeline is not None:
+        return timeline
+
+    full = cache.get(timeline_cache_key(version, '')) if chief_slug else None
+    if full is None:
+        chiefs, events = build_events()
+        counts = {}
+        for event in events:
+            counts[event.chief_slug] = counts.get(event.chief_slug, 0) + 1
+        filters = [(chief, counts.get(chief.slug, 0)) for chief in chiefs]
+        full = assemble(version, '', chiefs, events, filters)
+        cache.set(timeline_cache_key(version, ''), full, TIMELINE_TIMEOUT)
+    if not chief_slug:
+        return full
+
+    events = [event for event in full.events if event.chief_slug == chief_slug]
+    timeline = assemble(version, chief_slug, full.chiefs, events, full.filters)
+    if full.chief(chief_slug):
+        cache.set(key, timeline, TIMELINE_TIMEOUT)
+    return timeline
@@ -6,7 +6,9 @@ urlpatterns = [
     path('heritage/', views.heritage_view, name='heritage'),
     path('heritage/chief/<slug:slug>/', views.chief_detail, name='chief_detail'),
     path('tourism/', views.tourism_view, name='tourism'),
+    path('tourism/availability/', views.tourism_availability, name='tourism_availability'),
     path('tourism/<slug:slug>/', views.tourism_detail, name='tourism_detail'),
+    path('tourism/<slug:slug>/availability/', views.tourism_availability, name='site_availability'),
     path('booking/<str:reference>/', views.booking_confirmation, name='booking_confirmation'),
     path('products/', views.products_view, name='products'),
     path('products/<slug:slug>/', views.product_detail, name='product_detail'),
@@ -14,4 +16,5 @@ urlpatterns = [
     path('projects/<slug:slug>/', views.project_detail, name='project_detail'),
     path('contact/', views.contact_view, name='contact'),
     path('newsletter/subscribe/', views.newsletter_subscribe, name='newsletter_subscribe'),
+    path('metrics/', views.performance_metrics, name='performance_metrics'),
 ]
@@ -1,19 +1,39 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.http import Http404, JsonResponse
 from django.core.paginator import Paginator
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
 from .models import (
-    Chief, HistoricalEvent, TourismSite, Booking,
-    Product, ProductCategory, Project, ProjectCategory,
-    Newsletter, ContactMessage, Bid
+    Chief, HistoricalEvent, TourismSite, Booking, CapacityExceeded,
+    Product, ProductCategory, Project, ProjectCategory
 )
+from .availability import MAX_DAYS, site_calendars
+from .bidding import BidRejected, parse_amount, place_bid
+from .conditional import chief_page, conditional_page, product_page, project_page, tourism_page
+from .metrics import can_read_metrics, registry
+from .pagination import ESTIMATE_CAP, InvalidCursor, estimated_count, paginate_by_cursor
+from .references import is_valid, normalize
+from .replica import get_or_404, replica_reads
+from .search import search_products
+from .timeline import get_timeline
+from .writebehind import submissions
 
+PRODUCTS_PER_PAGE = 12
+# References of the bookings made from this session, whose confirmation
+# pages may show the visitor's contact details
+BOOKINGS_SESSION_KEY = 'bookings'
+MAX_SESSION_BOOKINGS = 10
 
+
+@replica_reads
 def home(request):
     """Homepage with featured content"""
     chiefs = Chief.objects.all()[:2]  # First and current chief
-    featured_projects = Project.objects.filter(featured=True, status='ongoing')[:3]
+    featured_projects = Project.objects.filter(featured=True, status='ongoing').select_related('category')[:3]
     featured_products = Product.objects.filter(featured=True, status='available')[:6]
     recent_events = HistoricalEvent.objects.all()[:3]
     tourism_sites = TourismSite.objects.filter(is_active=True)[:3]
@@ -28,31 +48,29 @@ def home(request):
     return render(request, 'core/home.html', context)
 
 
+@replica_reads
 def heritage_view(request):
     """Historical background page"""
-    chiefs = Chief.objects.all()
-    events = HistoricalEvent.objects.all()
-    
-    # Filter by chief if specified
-    chief_filter = request.GET.get('chief')
-    if chief_filter:
-        events = events.filter(chief__slug=chief_filter)
-    
+    timeline = get_timeline(request.GET.get('chief', ''))
     context = {
-        'chiefs': chiefs,
-        'events': events,
+        'timeline': timeline,
+        'chiefs': timeline.chiefs,
     }
     return render(request, 'core/heritage.html', context)
 
 
+@conditional_page(chief_page)
 def chief_detail(request, slug):
     """Individual chief detail page"""
-    chief = get_object_or_404(Chief, slug=slug)
-    events = chief.events.all()
+    timeline = get_timeline(slug)
+    chief = timeline.chief(slug)
+    if chief is None:
+        raise Http404('No Chief matches the given query.')
     
     context = {
         'chief': chief,
-        'events': events,
+        'events': timeline.events,
+        'timeline': timeline,
     }
     return render(request, 'core/chief_detail.html', context)
 
@@ -73,6 +91,7 @@ def tourism_view(request):
     return render(request, 'core/tourism.html', context)
 
 
+@conditional_page(tourism_page)
 def tourism_detail(request, slug):
     """Individual tourism site detail and booking"""
     site = get_object_or_404(TourismSite, slug=slug, is_active=True)
@@ -83,93 +102,153 @@ def tourism_detail(request, slug):
         visitor_email = request.POST.get('visitor_email')
         visitor_phone = request.POST.get('visitor_phone')
         visitor_type = request.POST.get('visitor_type')
-        number_of_visitors = int(request.POST.get('number_of_visitors', 1))
-        visit_date = request.POST.get('visit_date')
+        try:
+            number_of_visitors = int(request.POST.get('number_of_visitors', 1))
+        except ValueError:
+            number_of_visitors = 0
+        visit_date = parse_date(request.POST.get('visit_date') or '')
         visit_time = request.POST.get('visit_time')
         special_requirements = request.POST.get('special_requirements', '')
         
+        if visit_date is None or number_of_visitors < 1:
+            messages.error(request, 'Please choose a valid visit date and number of visitors.')
+            return redirect('tourism_detail', slug=slug)
+        
         # Calculate total amount
         if visitor_type == 'local':
             total_amount = site.entry_fee_local * number_of_visitors
         else:
             total_amount = site.entry_fee_foreign * number_of_visitors
         
-        booking = Booking.objects.create(
-            tourism_site=site,
-            visitor_name=visitor_name,
-            visitor_email=visitor_email,
-            visitor_phone=visitor_phone,
-            visitor_type=visitor_type,
-            number_of_visitors=number_of_visitors,
-            visit_date=visit_date,
-            visit_time=visit_time,
-            special_requirements=special_requirements,
-            total_amount=total_amount,
-        )
+        try:
+            booking = Booking.objects.create(
+                tourism_site=site,
+                visitor_name=visitor_name,
+                visitor_email=visitor_email,
+                visitor_phone=visitor_phone,
+                visitor_type=visitor_type,
+                number_of_visitors=number_of_visitors,
+                visit_date=visit_date,
+                visit_time=visit_time,
+                special_requirements=special_requirements,
+                total_amount=total_amount,
+            )
+        except CapacityExceeded as exc:
+            messages.error(request, f'Sorry, {site.name} cannot take {number_of_visitors} more visitor(s) on {visit_date:%B %d, %Y}. {exc}.')
+            return redirect('tourism_detail', slug=slug)
         
+        own = request.session.get(BOOKINGS_SESSION_KEY, [])
+        request.session[BOOKINGS_SESSION_KEY] = [*own, booking.booking_reference][-MAX_SESSION_BOOKINGS:]
         messages.success(request, f'Booking confirmed! Your reference number is {booking.booking_reference}')
         return redirect('booking_confirmation', reference=booking.booking_reference)
     
     context = {
         'site': site,
+        'today': timezone.localdate(),
     }
     return render(request, 'core/tourism_detail.html', context)
 
 
+@require_GET
+def tourism_availability(request, slug=None):
+    """JSON calendar of remaining places per day for one or all active sites"""
+    start = parse_date(request.GET.get('start') or '') or timezone.localdate()
+    try:
+        days = int(request.GET.get('days', 90))
+    except ValueError:
+        days = 0
+    if not 1 <= days <= MAX_DAYS:
+        return JsonResponse({'error': f'days must be between 1 and {MAX_DAYS}'}, status=400)
+    
+    if slug:
+        site = get_object_or_404(TourismSite, slug=slug, is_active=True)
+        payload = site_calendars([site], start, days, site_id=site.pk)
+    else:
+        payload = site_calendars(TourismSite.objects.filter(is_active=True), start, days)
+    return JsonResponse(payload)
+
+
+@replica_reads
 def booking_confirmation(request, reference):
-    """Booking confirmation page"""
-    booking = get_object_or_404(Booking, booking_reference=reference)
+    """Booking confirmation page; contact details only for the session that booked"""
+    if not is_valid(reference):
+        raise Http404('No Booking matches the given query.')
+    reference = normalize(reference)
+    booking = get_or_404(Booking.objects.select_related('tourism_site'), booking_reference=reference)
     
     context = {
         'booking': booking,
+        'show_contact': reference in request.session.get(BOOKINGS_SESSION_KEY, ()),
     }
     return render(request, 'core/booking_confirmation.html', context)
 
 
-def products_view(request):
-    """Products catalog with filtering"""
-    products = Product.objects.all()
-    categories = ProductCategory.objects.all()
+def filter_products(params):
+    """The catalog queryset for the category/type/status/search query parameters"""
+    products = Product.objects.select_related('category')
     
     # Filter by category
-    category_slug = request.GET.get('category')
+    category_slug = params.get('category')
     if category_slug:
         products = products.filter(category__slug=category_slug)
     
     # Filter by type
-    product_type = request.GET.get('type')
+    product_type = params.get('type')
     if product_type:
         products = products.filter(product_type=product_type)
     
     # Filter by status
-    status = request.GET.get('status')
+    status = params.get('status')
     if status:
         products = products.filter(status=status)
     else:
         products = products.exclude(status='sold')
     
     # Search
-    search = request.GET.get('search')
+    search = params.get('search')
     if search:
-        products = products.filter(
-            Q(name__icontains=search) |
-            Q(description__icontains=search) |
-            Q(artist_name__icontains=search)
-        )
+        products = search_products(products, search)
+    return products
+
+
+@replica_reads
+def products_view(request):
+    """Products catalog with filtering"""
+    products = filter_products(request.GET)
+    categories = ProductCategory.objects.all()
     
-    # Pagination
-    paginator = Paginator(products, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination: cursor based when enabled or when following a cursor link,
+    # otherwise (and for search results) numbered pages with an exact count
+    filters = request.GET.copy()
+    filters.pop('page', None)
+    cursor = filters.pop('cursor', [None])[0]
+    cursor_mode = (settings.PRODUCTS_CURSOR_PAGINATION or cursor is not None) and not filters.get('search')
+    if cursor_mode:
+        try:
+            page_obj = paginate_by_cursor(products, cursor, PRODUCTS_PER_PAGE)
+        except InvalidCursor:
+            return redirect(f"{request.path}?{filters.urlencode()}")
+        total = estimated_count(products)
+        total_capped = total > ESTIMATE_CAP
+        total = min(total, ESTIMATE_CAP)
+    else:
+        paginator = Paginator(products, PRODUCTS_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        total, total_capped = paginator.count, False
     
     context = {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'total': total,
+        'total_capped': total_capped,
+        'filter_query': filters.urlencode(),
         'categories': categories,
         'product_types': Product.PRODUCT_TYPES,
     }
     return render(request, 'core/products.html', context)
 
 
+@conditional_page(product_page)
 def product_detail(request, slug):
     """Individual product detail with bidding"""
     product = get_object_or_404(Product, slug=slug)
@@ -177,36 +256,24 @@ def product_detail(request, slug):
     
     if request.method == 'POST':
         # Handle bid submission
-        bidder_name = request.POST.get('bidder_name')
-        bidder_email = request.POST.get('bidder_email')
-        bidder_phone = request.POST.get('bidder_phone')
-        bid_amount = float(request.POST.get('bid_amount'))
+        bid_amount = parse_amount(request.POST.get('bid_amount'))
+        if bid_amount is None:
+            messages.error(request, 'Please enter a valid bid amount')
+            return redirect('product_detail', slug=slug)
         
-        # Validate bid amount
-        min_bid = product.current_bid or product.starting_bid or product.price
-        if bid_amount > min_bid:
-            # Update previous winning bid
-            Bid.objects.filter(product=product, is_winning=True).update(is_winning=False)
-            
-            # Create new bid
-            bid = Bid.objects.create(
-                product=product,
-                bidder_name=bidder_name,
-                bidder_email=bidder_email,
-                bidder_phone=bidder_phone,
-                bid_amount=bid_amount,
-                is_winning=True
+        try:
+            place_bid(
+                product,
+                bidder_name=request.POST.get('bidder_name'),
+                bidder_email=request.POST.get('bidder_email'),
+                bidder_phone=request.POST.get('bidder_phone'),
+                amount=bid_amount,
             )
-            
-            # Update product current bid
-            product.current_bid = bid_amount
-            product.status = 'bidding'
-            product.save()
-            
-            messages.success(request, 'Your bid has been placed successfully!')
-            return redirect('product_detail', slug=slug)
+        except BidRejected as exc:
+            messages.error(request, str(exc))
         else:
-            messages.error(request, f'Bid must be higher than ${min_bid}')
+            messages.success(request, 'Your bid has been placed successfully!')
+        return redirect('product_detail', slug=slug)
     
     context = {
         'product': product,
@@ -217,7 +284,7 @@ def product_detail(request, slug):
 
 def projects_view(request):
     """Projects showcase page"""
-    projects = Project.objects.all()
+    projects = Project.objects.select_related('category')
     categories = ProjectCategory.objects.all()
     
     # Filter by category
@@ -238,6 +305,7 @@ def projects_view(request):
     return render(request, 'core/projects.html', context)
 
 
+@conditional_page(project_page)
 def project_detail(request, slug):
     """Individual project detail page"""
     project = get_object_or_404(Project, slug=slug)
@@ -248,6 +316,14 @@ def project_detail(request, slug):
     return render(request, 'core/project_detail.html', context)
 
 
+def invalid_fields(exc):
+    """One line naming every field a submission got wrong"""
+    return ' '.join(
+        f'{field.replace("_", " ").capitalize()}: {error}'
+        for field, errors in exc.message_dict.items() for error in errors
+    )
+
+
 def contact_view(request):
     """Contact page"""
     if request.method == 'POST':
@@ -257,13 +333,17 @@ def contact_view(request):
         subject = request.POST.get('subject')
         message = request.POST.get('message')
         
-        ContactMessage.objects.create(
-            name=name,
-            email=email,
-            phone=phone,
-            subject=subject,
-            message=message
-        )
+        try:
+            submissions.submit('contact', {
+                'name': name,
+                'email': email,
+                'phone': phone,
+                'subject': subject,
+                'message': message,
+            })
+        except ValidationError as exc:
+            messages.error(request, invalid_fields(exc))
+            return redirect('contact')
         
         messages.success(request, 'Thank you for contacting us! We will get back to you soon.')
         return redirect('contact')
@@ -274,19 +354,25 @@ def contact_view(request):
 def newsletter_subscribe(request):
     """Newsletter subscription handler"""
     if request.method == 'POST':
-        email = request.POST.get('email')
+        # Stored lowercased, like import_newsletter; a known address is skipped on insert
+        email = request.POST.get('email', '').strip().lower()
         name = request.POST.get('name', '')
-        
-        newsletter, created = Newsletter.objects.get_or_create(
-            email=email,
-            defaults={'name': name}
-        )
-        
-        if created:
-            messages.success(request, 'Successfully subscribed to our newsletter!')
+
+        try:
+            submissions.submit('newsletter', {'email': email, 'name': name})
+        except ValidationError as exc:
+            messages.error(request, invalid_fields(exc))
         else:
-            messages.info(request, 'You are already subscribed to our newsletter.')
-        
+            messages.success(request, 'Successfully subscribed to our newsletter!')
+
         return redirect(request.META.get('HTTP_REFERER', 'home'))
     
     return redirect('home')
+
+
+@require_GET
+def performance_metrics(request):
+    """Per-view request timing histograms and fragment cache hit ratios, for staff and the metrics scraper"""
+    if not can_read_metrics(request):
+        return JsonResponse({'error': 'Not allowed'}, status=403)
+    return JsonResponse({'views': registry.snapshot(), 'fragments': registry.fragment_snapshot()})
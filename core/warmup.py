@@ -0,0 +1,52 @@
+"""Template compilation ahead of the first request.
+
+The cached template loader parses a template the first time it is used in
+a process, so without a warmup the first visitor to each page after a
+worker (re)start waits for ``base.html`` and the page template to be
+compiled. ``warm_templates()`` loads every template under the project
+template directories (``templates/core/``, ``base.html``, the admin
+overrides) into that cache; settings/wsgi.py and asgi.py call ``warmup()``
+before the application is handed to the server.
+"""
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Names of the templates in ``engine``'s DIRS, as get_template expects them"""
+    for directory in engine.dirs:
+        root = Path(directory)
+        for path in sorted(root.rglob('*.html')):
+            yield path.relative_to(root).as_posix()
+
+
+def warm_templates():
+    """Compile the project templates into the cached loader; returns how many"""
+    count = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except TemplateSyntaxError:
+                # Left for the request that uses it to report
+                logger.exception('Could not compile template %s', name)
+                continue
+            count += 1
+    return count
+
+
+def warmup():
+    if not settings.TEMPLATE_WARMUP:
+        return
+    started = time.perf_counter()
+    count = warm_templates()
+    logger.info('Compiled %d templates in %.0f ms', count, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,233 @@
+"""Write-behind queue for contact messages and newsletter sign-ups.
+
+The contact and newsletter views hand their row to ``submissions`` and
+redirect straight away. A background thread writes the pending rows in
+batches, so these low-value inserts take the database write lock once per
+batch instead of once per request and stay out of the way of bookings and
+bids. Newsletter rows use ``ignore_conflicts``, so an e-mail address that is
+already subscribed is skipped.
+
+Before a request returns, its row is appended to a spill file in
+WRITE_BEHIND_DIR, and a marker is appended after each committed batch. A
+process that dies with rows pending leaves its file behind; the next
+flusher thread to start, or ``manage.py flush_write_behind``, replays the
+uncommitted part. Each process holds an flock on its own file, which is how
+a live worker's file is told apart from an orphan. Delivery is
+at-least-once: a crash between a commit and its marker repeats that batch.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process, nothing to lock against
+    fcntl = None
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, connection, transaction
+
+from .models import ContactMessage, Newsletter
+
+logger = logging.getLogger(__name__)
+
+MODELS = {'contact': ContactMessage, 'newsletter': Newsletter}
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0  # seconds a submission may wait for others to batch with
+RETRY_INTERVAL = 5.0
+
+
+def validate(kind, fields):
+    """Raise ValidationError for a row that is missing a required field or
+    that the database would refuse; checked before the row is queued"""
+    MODELS[kind](**fields).full_clean(validate_unique=False, validate_constraints=False)
+
+
+def insert(items):
+    """Insert ``(kind, fields)`` items in one transaction"""
+    rows = {}
+    for kind, fields in items:
+        rows.setdefault(kind, []).append(MODELS[kind](**fields))
+    with transaction.atomic():
+        for kind, objs in rows.items():
+            MODELS[kind].objects.bulk_create(
+                objs, batch_size=BATCH_SIZE, ignore_conflicts=kind == 'newsletter'
+            )
+
+
+def save_rows(items):
+    """Insert ``items``, dropping (and logging) rows the database refuses"""
+    try:
+        insert(items)
+    except IntegrityError:
+        # One bad row must not hold back the rest of its batch
+        for item in items:
+            try:
+                insert([item])
+            except IntegrityError:
+                logger.exception('Dropping write-behind %s row %r', *item)
+
+
+def read_spill(fh):
+    """The items in a spill file that were not committed yet"""
+    items, committed = [], 0
+    for line in fh:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # the process died halfway through writing this line
+        if 'committed' in record:
+            committed = record['committed']
+        else:
+            items.append((record['kind'], record['fields']))
+    return items[committed:]
+
+
+def recover(directory, skip=None):
+    """Replay spill files left behind by dead processes; returns the rows replayed"""
+    replayed = 0
+    for path in sorted(Path(directory).glob('*.jsonl')):
+        if path == skip:
+            continue
+        try:
+            fh = open(path, 'r+')
+        except FileNotFoundError:
+            continue  # replayed by another process meanwhile
+        with fh:
+            if fcntl:
+                try:
+                    fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # a live process owns it
+            if not os.path.exists(path):
+                continue
+            items = read_spill(fh)
+            for start in range(0, len(items), BATCH_SIZE):
+                save_rows(items[start:start + BATCH_SIZE])
+            path.unlink()
+        replayed += len(items)
+        if items:
+            logger.warning('Replayed %d write-behind rows from %s', len(items), path.name)
+    return replayed
+
+
+class WriteBehindQueue:
+    """Bounded in-process queue of rows, flushed in batches by a daemon thread.
+
+    ``submit()`` raises ValidationError for an invalid row, since a row the
+    flush refuses can only be logged. It writes synchronously instead when
+    WRITE_BEHIND is off, when the caller is inside a transaction (so the row
+    commits or rolls back with it) or when WRITE_BEHIND_MAX_PENDING rows are
+    already waiting.
+    """
+
+    def __init__(self, directory=None, autostart=True):
+        self._directory = directory
+        self.autostart = autostart
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.flushing = threading.Lock()
+        self.pending = deque()
+        self.committed = 0
+        self.pid = None
+        self.path = self.fd = None
+
+    @property
+    def directory(self):
+        return Path(self._directory or settings.WRITE_BEHIND_DIR)
+
+    def submit(self, kind, fields):
+        validate(kind, fields)
+        if not settings.WRITE_BEHIND or connection.in_atomic_block:
+            save_rows([(kind, fields)])
+            return
+        with self.lock:
+            queued = len(self.pending) < settings.WRITE_BEHIND_MAX_PENDING
+            if queued:
+                self._open()
+                self._append({'kind': kind, 'fields': fields})
+                self.pending.append((kind, fields))
+                self.wakeup.notify()
+        if not queued:
+            save_rows([(kind, fields)])
+
+    def flush(self):
+        """Write everything pending now; returns the number of rows written"""
+        written = 0
+        with self.flushing:
+            while True:
+                with self.lock:
+                    batch = list(islice(self.pending, BATCH_SIZE))
+                if not batch:
+                    return written
+                save_rows(batch)
+                with self.lock:
+                    for _ in batch:
+                        self.pending.popleft()
+                    if self.pending:
+                        self.committed += len(batch)
+                        self._append({'committed': self.committed})
+                    else:
+                        # Everything in the file is committed: start it over
+                        os.ftruncate(self.fd, 0)
+                        self.committed = 0
+                written += len(batch)
+
+    def close(self):
+        """Flush and remove this process's spill file"""
+        self.flush()
+        with self.lock:
+            if self.fd is not None and self.pid == os.getpid():
+                os.unlink(self.path)
+                os.close(self.fd)
+            self.pid = self.path = self.fd = None
+
+    def _open(self):
+        if self.pid == os.getpid():
+            return
+        # First submission in this process, or the first since a fork: rows
+        # queued by the parent are the parent's to write.
+        self.pending.clear()
+        self.committed = 0
+        self.pid = os.getpid()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f'{self.pid}-{uuid.uuid4().hex[:8]}.jsonl'
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        if fcntl:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        if self.autostart:
+            threading.Thread(target=self._run, name='write-behind', daemon=True).start()
+            atexit.register(self.close)
+
+    def _append(self, record):
+        # A single write() on an O_APPEND descriptor, synced: the line is on
+        # disk before the request returns and survives the process or the
+        # machine going down.
+        os.write(self.fd, json.dumps(record).encode() + b'\n')
+        os.fsync(self.fd)
+
+    def _run(self):
+        try:
+            recover(self.directory, skip=self.path)
+        except DatabaseError:
+            logger.exception('Could not replay orphaned write-behind files')
+        while True:
+            with self.lock:
+                self.wakeup.wait_for(lambda: self.pending)
+            time.sleep(FLUSH_INTERVAL)
+            close_old_connections()
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception('Write-behind flush failed, retrying')
+                time.sleep(RETRY_INTERVAL)
+
+
+submissions = WriteBehindQueue()
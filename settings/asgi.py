@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.settings')
+# Every request runs its queries on a fresh thread, so connections can't be reused
+os.environ.setdefault('DJANGO_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
+
+from core.warmup import warmup  # noqa: E402 (needs the apps loaded)
+
+warmup()
@@ -0,0 +1,28 @@
+"""
+URL configuration when ASYNC_VIEWS is on (see settings/settings.py).
+
+The same routes as settings/urls.py, with core's read-only pages served by
+the async views in core/async_views.py.
+"""
+import re
+
+from django.contrib import admin
+from django.urls import path, re_path, include
+from django.conf import settings
+from django.conf.urls.static import static
+from core import assets
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', include('core.async_urls')),
+]
+
+# Collected static files, with far-future caching for the hashed names.
+# (runserver serves the uncollected files itself while DEBUG is on.)
+urlpatterns += [
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), assets.serve),
+]
+
+# Serve media files in development
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
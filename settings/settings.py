@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,11 +63,19 @@ CSRF_TRUSTED_ORIGINS = [
     "https://mkwawaheritage.com/"
 ]
 
-ROOT_URLCONF = 'settings.urls'
+# Serve the read-only pages from their async views (core/async_views.py,
+# routed by settings.asgi_urls). Off by default, under ASGI too: they benched
+# at about 88 req/s against about 160 for the sync views under WSGI
+# (manage.py bench_asgi), since the async ORM still runs a request's queries
+# one after another on a single thread.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS', '0') == '1'
+
+ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'settings.asgi_urls' if ASYNC_VIEWS else 'settings.urls')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates, timed for the request metrics (core/metrics.py)
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -81,6 +92,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'settings.wsgi.application'
 
+# Compile every project template into the cached loader when a worker
+# starts (core/warmup.py); off under DEBUG unless DJANGO_TEMPLATE_WARMUP=1
+TEMPLATE_WARMUP = os.environ.get('DJANGO_TEMPLATE_WARMUP', '0' if DEBUG else '1') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -89,10 +104,77 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open between requests, checked before reuse.
+        # settings/asgi.py turns this off: each ASGI request runs its queries
+        # on a thread of its own, so there is nothing to reuse.
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock at BEGIN, see core/sqlite.py
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    }
+}
+# A copy of the primary that the public pages read from, refreshed with the
+# SQLite backup API by `manage.py refresh_replica --every 5` (core/replica.py).
+# Pages only read it while its snapshot is under REPLICA_MAX_LAG seconds old.
+DATABASES['replica'] = {**DATABASES['default'], 'NAME': BASE_DIR / 'db.replica.sqlite3'}
+DATABASE_ROUTERS = ['core.replica.ReplicaRouter']
+READ_REPLICA = True
+REPLICA_MAX_LAG = 15
+
+# Applied to every new SQLite connection (core/sqlite.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',   # durable at checkpoints; safe with WAL
+    'busy_timeout': 20000,     # ms to wait for the write lock
+    'mmap_size': 268435456,    # read through 256 MiB of memory map
+    'cache_size': -65536,      # 64 MiB page cache per connection
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# File based so every worker process sees the same fragments and the same
+# invalidations (see core/caching.py). Product cards take one entry per
+# product, so the default cap of 300 entries would keep culling them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
     }
 }
 
 
+# Products catalog: keyset pagination (no COUNT/OFFSET per page, estimated
+# totals). Cursor links keep working when this is switched off.
+PRODUCTS_CURSOR_PAGINATION = False
+
+
+# Request timing (core/metrics.py): per-view histograms at /metrics/ for staff
+# or `Bearer <METRICS_TOKEN>`. The Server-Timing header shows every client how
+# long its request spent in SQL and templates, so it is off unless
+# DJANGO_SERVER_TIMING=1.
+SERVER_TIMING = os.environ.get('DJANGO_SERVER_TIMING', '0') == '1'
+METRICS_TOKEN = None
+
+# Contact messages and newsletter sign-ups are written in batches by a
+# background thread (core/writebehind.py) and journalled in WRITE_BEHIND_DIR
+# until committed. Past WRITE_BEHIND_MAX_PENDING queued rows, requests write
+# their own row again.
+WRITE_BEHIND = True
+WRITE_BEHIND_DIR = BASE_DIR / 'spool'
+WRITE_BEHIND_MAX_PENDING = 10000
+
+# Time from importing Django to a loaded URLconf in a fresh worker, as
+# measured by `manage.py profile_startup` (core/startup.py)
+STARTUP_TIME_BUDGET_MS = 1000
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -133,6 +215,17 @@ STATIC_ROOT = BASE_DIR / 'static'
 #     BASE_DIR / 'core' / 'static',
 # ]
 
+# Content-hashed names and gzip copies are written by collectstatic and
+# served with immutable caching headers (core/assets.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.assets.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings.settings')
 
 application = get_wsgi_application()
+
+from core.warmup import warmup  # noqa: E402 (needs the apps loaded)
+
+warmup()